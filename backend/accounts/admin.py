@@ -3,22 +3,23 @@ from django.urls import path
 from django.template.response import TemplateResponse
 from django.utils.html import format_html
 from unfold.admin import ModelAdmin
-from depod_api.admin_mixins import RichTextAdminMixin
+from depod_api.admin_mixins import LargeTableAdminMixin, RichTextAdminMixin
 from .models import User, StudentPromoCode, DeliveryAddress
 
 
 @admin.register(User)
-class UserAdmin(RichTextAdminMixin, ModelAdmin):
+class UserAdmin(LargeTableAdminMixin, RichTextAdminMixin, ModelAdmin):
     list_display = ('id', 'email', 'phone', 'first_name', 'last_name', 'student_status', 'created_at')
     search_fields = ('email', 'phone', 'first_name', 'last_name')
     list_filter = ('student_status',)
 
 
 @admin.register(StudentPromoCode)
-class StudentPromoCodeAdmin(RichTextAdminMixin, ModelAdmin):
+class StudentPromoCodeAdmin(LargeTableAdminMixin, RichTextAdminMixin, ModelAdmin):
     change_list_template = 'admin/accounts/studentpromocode/change_list.html'
     list_display = ('code', 'user', 'created_at', 'scanned_at', 'is_valid')
     search_fields = ('code', 'user__email', 'user__phone')
+    list_select_related = ('user',)
     list_filter = ('is_valid',)
 
     def get_urls(self):
@@ -38,9 +39,10 @@ class StudentPromoCodeAdmin(RichTextAdminMixin, ModelAdmin):
 
 
 @admin.register(DeliveryAddress)
-class DeliveryAddressAdmin(RichTextAdminMixin, ModelAdmin):
+class DeliveryAddressAdmin(LargeTableAdminMixin, RichTextAdminMixin, ModelAdmin):
     list_display = ('id', 'user', 'receiver_name', 'formatted_address', 'phone', 'is_default', 'created_at')
     search_fields = ('user__email', 'receiver_first_name', 'receiver_last_name', 'street', 'phone')
+    list_select_related = ('user',)
     list_filter = ('city', 'is_default', 'created_at')
     readonly_fields = ('created_at', 'updated_at')
     
@@ -0,0 +1,20 @@
+# Trigram indexes for the admin search_fields (PostgreSQL only, see depod_api.search_indexes)
+
+from django.db import migrations
+
+from depod_api.search_indexes import trigram_indexes
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('accounts', '0003_deliveryaddress'),
+    ]
+
+    operations = [
+        trigram_indexes('accounts_user', ['email', 'phone', 'first_name', 'last_name']),
+        trigram_indexes('accounts_studentpromocode', ['code']),
+        trigram_indexes('accounts_deliveryaddress', ['receiver_first_name', 'receiver_last_name', 'street', 'phone']),
+    ]
@@ -1,7 +1,8 @@
+from django.conf import settings
 from django.contrib import admin
 from unfold.admin import ModelAdmin, TabularInline
-from depod_api.admin_mixins import RichTextAdminMixin, RichTextTabularInlineMixin
-from .models import Category, Product, ProductImage
+from depod_api.admin_mixins import LargeTableAdminMixin, RichTextAdminMixin, RichTextTabularInlineMixin
+from .models import Category, Product, ProductImage, StockForecast
 from .forms import ProductAdminForm
 
 
@@ -18,7 +19,7 @@ class ProductImageInline(RichTextTabularInlineMixin, TabularInline):
 
 
 @admin.register(Product)
-class ProductAdmin(RichTextAdminMixin, ModelAdmin):
+class ProductAdmin(LargeTableAdminMixin, RichTextAdminMixin, ModelAdmin):
     form = ProductAdminForm
     list_display = (
         "id",
@@ -30,12 +31,52 @@ class ProductAdmin(RichTextAdminMixin, ModelAdmin):
         "student_discount",
         "in_stock",
         "stock",
+        "days_of_cover",
+        "stockout_date",
     )
     search_fields = ("name",)
     list_filter = ("category", "in_stock")
+    list_select_related = ("category", "forecast")
+    readonly_fields = ("sales_forecast",)
     inlines = [ProductImageInline]
 
+    def _forecast(self, obj):
+        try:
+            return obj.forecast
+        except StockForecast.DoesNotExist:
+            return None
+
+    def days_of_cover(self, obj):
+        """Days until the current stock runs out at the recent sales rate."""
+        forecast = self._forecast(obj)
+        if forecast is None or forecast.days_of_cover is None:
+            return "-"
+        return f"{forecast.days_of_cover:g}"
+    days_of_cover.short_description = "Ehtiyat (gün)"
+    days_of_cover.admin_order_field = "forecast__days_of_cover"
+
+    def stockout_date(self, obj):
+        forecast = self._forecast(obj)
+        return forecast.stockout_date if forecast and forecast.stockout_date else "-"
+    stockout_date.short_description = "Bitmə tarixi"
+    stockout_date.admin_order_field = "forecast__stockout_date"
+
+    def sales_forecast(self, obj):
+        forecast = self._forecast(obj)
+        if forecast is None:
+            return "Stok izlənmir və ya proqnoz hələ hesablanmayıb"
+        cover = f"{forecast.days_of_cover:g} gün" if forecast.days_of_cover is not None else "satış yoxdur"
+        return (
+            f"Gündəlik satış: {forecast.daily_velocity:g} ədəd · "
+            f"Son {settings.STOCK_FORECAST_DAYS} gün: {forecast.units_sold} ədəd · "
+            f"Ehtiyat: {cover} · "
+            f"Bitmə tarixi: {forecast.stockout_date or '-'} "
+            f"({forecast.computed_at:%d.%m.%Y %H:%M})"
+        )
+    sales_forecast.short_description = "Satış proqnozu"
+
 
 @admin.register(ProductImage)
 class ProductImageAdmin(RichTextAdminMixin, ModelAdmin):
     list_display = ("id", "product", "is_main")
+    list_select_related = ("product",)
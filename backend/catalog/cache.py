@@ -0,0 +1,86 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.response import Response
+from depod_api.versioning import cache_is_shared, get_version, get_versions, bump_version, conditional_response
+
+CATALOG_NAMESPACE = 'catalog'
+
+
+def get_catalog_version():
+    return get_version(CATALOG_NAMESPACE)
+
+
+def bump_catalog_version():
+    """Invalidate every cached catalog response once the current transaction commits."""
+    bump_version(CATALOG_NAMESPACE)
+
+
+def stock_namespace(product_id):
+    """
+    Version namespace of a product's stock count. Only responses that include
+    ``stock`` (product detail and batch) depend on it; listings carry
+    ``in_stock`` alone, so stock moves that leave it unchanged keep them cached.
+    """
+    return f'catalog.stock:{product_id}'
+
+
+def bump_stock_versions(product_ids):
+    """Invalidate cached responses showing the stock of ``product_ids`` (on commit)."""
+    for product_id in product_ids:
+        bump_version(stock_namespace(product_id))
+
+
+def catalog_cache_key(request, versions=None):
+    # Absolute URI: responses embed absolute media URLs built from the request host
+    uri = request.build_absolute_uri()
+    digest = hashlib.sha1(uri.encode('utf-8')).hexdigest()
+    if versions is None:
+        versions = {CATALOG_NAMESPACE: get_catalog_version()}
+    stamp = '.'.join(str(versions[ns]) for ns in sorted(versions))
+    return f'catalog:resp:{stamp}:{digest}'
+
+
+def cached_catalog_response(request, render, namespaces=()):
+    """
+    Serve ``render()`` from the catalog cache, answering 304 to clients whose
+    validators match the current catalog version (and the versions of any
+    extra ``namespaces`` the response depends on). Only successful responses
+    are stored; anything else is returned as-is and recomputed next time.
+    Responses are not cached when the cache is process-local.
+    """
+    if not cache_is_shared():
+        return render()
+    namespaces = [CATALOG_NAMESPACE, *namespaces]
+
+    def cached():
+        key = catalog_cache_key(request, get_versions(namespaces))
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+        response = render()
+        if response.status_code == 200:
+            cache.set(key, response.data, settings.CATALOG_CACHE_TIMEOUT)
+        return response
+    return conditional_response(request, namespaces, cached)
+
+
+class CatalogCacheMixin:
+    """Caches list/retrieve responses of read-only catalog viewsets."""
+
+    def get_cache_namespaces(self):
+        """Version namespaces the current response depends on besides the catalog."""
+        return ()
+
+    def list(self, request, *args, **kwargs):
+        return cached_catalog_response(
+            request, lambda: super(CatalogCacheMixin, self).list(request, *args, **kwargs),
+            self.get_cache_namespaces(),
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return cached_catalog_response(
+            request, lambda: super(CatalogCacheMixin, self).retrieve(request, *args, **kwargs),
+            self.get_cache_namespaces(),
+        )
@@ -0,0 +1,110 @@
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Count, F, Max, Min, Q
+from rest_framework.exceptions import ValidationError
+
+from .models import ProductSpec
+
+SORTS = {
+    'newest': ('-id',),
+    'price': ('effective_price', '-id'),
+    '-price': ('-effective_price', '-id'),
+}
+
+_TRUE = ('1', 'true', 'yes')
+_FALSE = ('0', 'false', 'no')
+
+
+def _decimal_param(params, name):
+    raw = params.get(name)
+    if raw in (None, ''):
+        return None
+    try:
+        return Decimal(raw)
+    except InvalidOperation:
+        raise ValidationError({name: ['Yanlış qiymət']})
+
+
+def _bool_param(params, name):
+    raw = (params.get(name) or '').strip().lower()
+    if raw in _TRUE:
+        return True
+    if raw in _FALSE:
+        return False
+    return None
+
+
+def filter_products(qs, params):
+    """
+    Apply the faceted query parameters:
+    ``min_price``/``max_price`` (effective price), ``in_stock``, ``has_discount``,
+    ``spec=<label>:<value>`` (repeatable; values of one label are OR-ed, labels
+    are AND-ed) and ``sort`` (``newest``, ``price``, ``-price``).
+    """
+    min_price = _decimal_param(params, 'min_price')
+    if min_price is not None:
+        qs = qs.filter(effective_price__gte=min_price)
+    max_price = _decimal_param(params, 'max_price')
+    if max_price is not None:
+        qs = qs.filter(effective_price__lte=max_price)
+
+    in_stock = _bool_param(params, 'in_stock')
+    if in_stock is not None:
+        qs = qs.filter(in_stock=in_stock)
+
+    has_discount = _bool_param(params, 'has_discount')
+    if has_discount is True:
+        qs = qs.filter(effective_price__lt=F('price'))
+    elif has_discount is False:
+        qs = qs.filter(effective_price__gte=F('price'))
+
+    specs = {}
+    for raw in params.getlist('spec'):
+        key, sep, value = raw.partition(':')
+        if sep and key.strip() and value.strip():
+            specs.setdefault(key.strip(), []).append(value.strip())
+    for key, values in specs.items():
+        qs = qs.filter(id__in=ProductSpec.objects.filter(key=key, value__in=values).values('product_id'))
+
+    sort = params.get('sort')
+    if sort:
+        if sort not in SORTS:
+            raise ValidationError({'sort': [f"Mümkün dəyərlər: {', '.join(SORTS)}"]})
+        qs = qs.order_by(*SORTS[sort])
+    return qs
+
+
+def product_facets(qs):
+    """
+    Facet counts for the filtered product queryset: one aggregate query for
+    stock/discount/price facets and one GROUP BY for all spec values.
+    """
+    base = qs.order_by()
+    summary = base.aggregate(
+        total=Count('id'),
+        in_stock=Count('id', filter=Q(in_stock=True)),
+        has_discount=Count('id', filter=Q(effective_price__lt=F('price'))),
+        min_price=Min('effective_price'),
+        max_price=Max('effective_price'),
+    )
+    spec_rows = (
+        ProductSpec.objects
+        .filter(product__in=base.values('id'))
+        .values('key', 'value')
+        .annotate(count=Count('product_id', distinct=True))
+        .order_by('key', '-count', 'value')
+    )
+    specs = {}
+    for row in spec_rows:
+        specs.setdefault(row['key'], []).append({'value': row['value'], 'count': row['count']})
+    return {
+        'total': summary['total'],
+        'in_stock': summary['in_stock'],
+        'has_discount': summary['has_discount'],
+        # Same string representation as the serializer's price fields
+        'price': {
+            'min': None if summary['min_price'] is None else f"{summary['min_price']:.2f}",
+            'max': None if summary['max_price'] is None else f"{summary['max_price']:.2f}",
+        },
+        'specs': specs,
+    }
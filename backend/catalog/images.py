@@ -0,0 +1,129 @@
+"""
+Resized WebP/JPEG derivatives for catalog images.
+
+Derivatives are written next to the original under ``derivatives/`` and
+their storage names are recorded on the owning row (``variants`` /
+``*_variants`` JSON fields), so serializers can emit variant URLs without
+touching the filesystem. The recorded ``source`` is the original's name and
+is used to detect when an upload has been replaced.
+"""
+import io
+import logging
+import os
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# name -> target width in pixels (never upscaled)
+VARIANTS = (
+    ('thumb', 160),
+    ('card', 480),
+    ('detail', 1200),
+)
+WEBP_QUALITY = 80
+JPEG_QUALITY = 82
+
+
+def _derivative_name(source_name, variant, ext):
+    stem, _ = os.path.splitext(source_name)
+    return f'derivatives/{stem}/{variant}.{ext}'
+
+
+def _encode(img, fmt, **params):
+    buf = io.BytesIO()
+    img.save(buf, fmt, **params)
+    return ContentFile(buf.getvalue())
+
+
+def _store(storage, name, content):
+    if storage.exists(name):
+        storage.delete(name)
+    return storage.save(name, content)
+
+
+def generate_variants(field_file):
+    """
+    Render every variant of ``field_file`` and return the variants map
+    ``{'source': name, '<variant>': {'width': w, 'webp': name, 'jpeg': name}}``.
+    Returns an empty map when the file is missing or not a readable image.
+    """
+    if not field_file:
+        return {}
+    storage = field_file.storage
+    try:
+        with field_file.open('rb') as fh:
+            original = ImageOps.exif_transpose(Image.open(fh))
+            original.load()
+    except Exception as e:
+        logger.warning(f"Cannot build variants for {field_file.name}: {str(e)}")
+        return {}
+
+    has_alpha = original.mode in ('RGBA', 'LA') or (original.mode == 'P' and 'transparency' in original.info)
+    original = original.convert('RGBA' if has_alpha else 'RGB')
+
+    variants = {'source': field_file.name}
+    for variant, width in VARIANTS:
+        img = original
+        if original.width > width:
+            height = max(1, round(original.height * width / original.width))
+            img = original.resize((width, height), Image.LANCZOS)
+        webp = _store(storage, _derivative_name(field_file.name, variant, 'webp'),
+                      _encode(img, 'WEBP', quality=WEBP_QUALITY, method=4))
+        # JPEG has no alpha channel: flatten onto white
+        if has_alpha:
+            flat = Image.new('RGB', img.size, (255, 255, 255))
+            flat.paste(img, mask=img.getchannel('A'))
+            img = flat
+        jpeg = _store(storage, _derivative_name(field_file.name, variant, 'jpg'),
+                      _encode(img, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True))
+        variants[variant] = {'width': img.width, 'webp': webp, 'jpeg': jpeg}
+    return variants
+
+
+def delete_variants(storage, variants):
+    for variant, _ in VARIANTS:
+        for name in (variants or {}).get(variant, {}).values():
+            if isinstance(name, str) and storage.exists(name):
+                storage.delete(name)
+
+
+def variants_outdated(field_file, variants):
+    source = field_file.name if field_file else None
+    return (variants or {}).get('source') != source
+
+
+def sync_variants(instance, field_name, variants_field):
+    """
+    Regenerate derivatives of ``instance.<field_name>`` if the stored map does
+    not describe the current file. Saves only ``variants_field``, via
+    ``update()`` so that no further save signals fire.
+    """
+    field_file = getattr(instance, field_name)
+    current = getattr(instance, variants_field)
+    if not variants_outdated(field_file, current):
+        return False
+    delete_variants(field_file.storage, current)
+    variants = generate_variants(field_file)
+    setattr(instance, variants_field, variants)
+    type(instance).objects.filter(pk=instance.pk).update(**{variants_field: variants})
+    return True
+
+
+def variant_urls(field_file, variants, request=None):
+    """``{'<variant>': {'width': w, 'webp': url, 'jpeg': url}}`` for serializers."""
+    if not field_file or variants_outdated(field_file, variants):
+        return None
+    storage = field_file.storage
+    result = {}
+    for variant, _ in VARIANTS:
+        entry = variants.get(variant)
+        if not entry:
+            continue
+        urls = {'width': entry['width']}
+        for fmt in ('webp', 'jpeg'):
+            url = storage.url(entry[fmt])
+            urls[fmt] = request.build_absolute_uri(url) if request is not None else url
+        result[variant] = urls
+    return result or None
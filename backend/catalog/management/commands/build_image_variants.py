@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from catalog.models import Category, Product, ProductImage
+from catalog.images import sync_variants
+
+
+class Command(BaseCommand):
+    help = 'Generate resized WebP/JPEG derivatives for existing catalog images'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Regenerate derivatives even if they are up to date',
+        )
+
+    def handle(self, *args, **options):
+        force = options.get('force')
+        targets = [
+            (Category, 'image', 'image_variants'),
+            (Product, 'main_image', 'main_image_variants'),
+            (ProductImage, 'image', 'variants'),
+        ]
+        for model, field_name, variants_field in targets:
+            qs = model.objects.exclude(**{field_name: ''}).exclude(**{f'{field_name}__isnull': True})
+            built = 0
+            for obj in qs.only('pk', field_name, variants_field).iterator():
+                if force:
+                    setattr(obj, variants_field, {})
+                if sync_variants(obj, field_name, variants_field):
+                    built += 1
+            self.stdout.write(
+                self.style.SUCCESS(f'{model.__name__}: built variants for {built} image(s)')
+            )
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from catalog.search import update_search_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the SQLite FTS5 product search table (PostgreSQL maintains its index itself)'
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            self.stdout.write('Search vector is a generated column on this database; nothing to rebuild.')
+            return
+        update_search_index()
+        self.stdout.write(self.style.SUCCESS('Product search index rebuilt'))
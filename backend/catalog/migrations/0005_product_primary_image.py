@@ -0,0 +1,29 @@
+# Generated by Django 5.0.7 on 2026-10-17 20:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_primary_image(apps, schema_editor):
+    Product = apps.get_model('catalog', 'Product')
+    ProductImage = apps.get_model('catalog', 'ProductImage')
+    Product.objects.update(primary_image=Subquery(
+        ProductImage.objects.filter(product_id=OuterRef('pk'), is_main=True).order_by('id').values('id')[:1]
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0004_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='primary_image',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='catalog.productimage'),
+        ),
+        migrations.RunPython(backfill_primary_image, migrations.RunPython.noop),
+    ]
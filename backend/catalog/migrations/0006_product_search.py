@@ -0,0 +1,52 @@
+from django.db import migrations
+
+# PostgreSQL: stored generated tsvector + GIN index. HTML from the rich-text
+# description is stripped; only string values of specs/features are indexed.
+POSTGRES_FORWARD = [
+    """
+    ALTER TABLE catalog_product ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple'::regconfig, coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('simple'::regconfig, regexp_replace(coalesce(description, ''), '<[^>]*>', ' ', 'g')), 'B') ||
+        setweight(jsonb_to_tsvector('simple'::regconfig, coalesce(specs, '[]'::jsonb) || coalesce(features, '[]'::jsonb), '["string"]'), 'C')
+    ) STORED
+    """,
+    "CREATE INDEX catalog_product_search_gin ON catalog_product USING gin (search_vector)",
+]
+POSTGRES_REVERSE = [
+    "DROP INDEX IF EXISTS catalog_product_search_gin",
+    "ALTER TABLE catalog_product DROP COLUMN IF EXISTS search_vector",
+]
+
+# SQLite: FTS5 shadow table keyed by product id (rows maintained by catalog.search).
+SQLITE_FORWARD = [
+    "CREATE VIRTUAL TABLE catalog_product_fts USING fts5(name, description, attrs, tokenize = 'unicode61 remove_diacritics 2')",
+    "INSERT INTO catalog_product_fts(rowid, name, description, attrs) "
+    "SELECT id, name, description, "
+    "coalesce((SELECT group_concat(value, ' ') FROM json_tree(p.specs) WHERE type = 'text'), '') || ' ' || "
+    "coalesce((SELECT group_concat(value, ' ') FROM json_tree(p.features) WHERE type = 'text'), '') "
+    "FROM catalog_product p",
+]
+SQLITE_REVERSE = [
+    "DROP TABLE IF EXISTS catalog_product_fts",
+]
+
+
+def _run(statements_by_vendor):
+    def run(apps, schema_editor):
+        for sql in statements_by_vendor.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0005_product_primary_image'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            _run({'postgresql': POSTGRES_FORWARD, 'sqlite': SQLITE_FORWARD}),
+            _run({'postgresql': POSTGRES_REVERSE, 'sqlite': SQLITE_REVERSE}),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.0.7 on 2026-10-17 20:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Case, F, Q, When
+
+
+def backfill(apps, schema_editor):
+    Product = apps.get_model('catalog', 'Product')
+    ProductSpec = apps.get_model('catalog', 'ProductSpec')
+    Product.objects.update(effective_price=Case(
+        When(Q(discount__gt=0) & Q(discounted_price__isnull=False) & Q(discounted_price__gt=0), then=F('discounted_price')),
+        default=F('price'),
+    ))
+    specs = []
+    for product_id, items in Product.objects.values_list('id', 'specs').iterator():
+        for item in items or []:
+            if not isinstance(item, dict):
+                continue
+            key = str(item.get('label') or '').strip()[:255]
+            value = str(item.get('value') or '').strip()[:255]
+            if key and value:
+                specs.append(ProductSpec(product_id=product_id, key=key, value=value))
+    ProductSpec.objects.bulk_create(specs, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0006_product_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='effective_price',
+            field=models.DecimalField(db_index=True, decimal_places=2, default=0, editable=False, max_digits=10),
+        ),
+        migrations.CreateModel(
+            name='ProductSpec',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=255)),
+                ('value', models.CharField(max_length=255)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='spec_values', to='catalog.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['key', 'value'], name='catalog_pro_key_3b5e20_idx')],
+            },
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
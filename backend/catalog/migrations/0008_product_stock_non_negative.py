@@ -0,0 +1,23 @@
+# Generated by Django 5.0.7 on 2026-10-17 20:37
+
+from django.db import migrations, models
+
+
+def clamp_negative_stock(apps, schema_editor):
+    Product = apps.get_model('catalog', 'Product')
+    Product.objects.filter(stock__lt=0).update(stock=0, in_stock=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0007_product_effective_price_productspec'),
+    ]
+
+    operations = [
+        migrations.RunPython(clamp_negative_stock, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='product',
+            constraint=models.CheckConstraint(check=models.Q(('stock__isnull', True), ('stock__gte', 0), _connector='OR'), name='catalog_product_stock_non_negative'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.0.7 on 2026-10-17 20:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0008_product_stock_non_negative'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockForecast',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='forecast', serialize=False, to='catalog.product')),
+                ('stock', models.IntegerField()),
+                ('units_sold', models.PositiveIntegerField(default=0)),
+                ('daily_velocity', models.FloatField(default=0)),
+                ('days_of_cover', models.FloatField(blank=True, db_index=True, null=True)),
+                ('stockout_date', models.DateField(blank=True, null=True)),
+                ('computed_at', models.DateTimeField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Trigram indexes for the admin search_fields (PostgreSQL only, see depod_api.search_indexes)
+
+from django.db import migrations
+
+from depod_api.search_indexes import trigram_indexes
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('catalog', '0009_stockforecast'),
+    ]
+
+    operations = [
+        trigram_indexes('catalog_category', ['name', 'key']),
+        trigram_indexes('catalog_product', ['name']),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import OuterRef, Q, Subquery
 
 
 class Category(models.Model):
@@ -6,6 +7,8 @@ class Category(models.Model):
     name = models.CharField(max_length=200)
     description = models.TextField(blank=True)
     image = models.ImageField(upload_to='categories/', null=True, blank=True)
+    # Resized derivatives of `image`, maintained by catalog.images
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     order_index = models.IntegerField(default=0)
 
     def __str__(self):
@@ -20,6 +23,13 @@ class Product(models.Model):
     features = models.JSONField(default=list, blank=True)
     highlights = models.JSONField(default=list, blank=True)
     main_image = models.ImageField(upload_to='products/main/', null=True, blank=True)
+    # Resized derivatives of `main_image`, maintained by catalog.images
+    main_image_variants = models.JSONField(default=dict, blank=True, editable=False)
+    # Denormalized first `is_main` ProductImage, used when main_image is empty.
+    # Maintained by ProductImage signals (see refresh_primary_images).
+    primary_image = models.ForeignKey(
+        'ProductImage', on_delete=models.SET_NULL, null=True, blank=True, editable=False, related_name='+'
+    )
     in_stock = models.BooleanField(default=True)
     stock = models.IntegerField(null=True, blank=True)
     # Admin-only: internal cost price (won't be exposed via public APIs)
@@ -28,19 +38,102 @@ class Product(models.Model):
     discounted_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
     discount = models.IntegerField(default=0)
     student_discount = models.IntegerField(default=0)
+    # Denormalized price after the product discount (before student pricing), for filtering/sorting
+    effective_price = models.DecimalField(max_digits=10, decimal_places=2, default=0, editable=False, db_index=True)
+
+    PRICE_FIELDS = frozenset({'price', 'discounted_price', 'discount'})
 
     def __str__(self):
         return self.name
 
+    def get_effective_price(self):
+        if self.discount and self.discounted_price:
+            return self.discounted_price
+        return self.price
+
+    def save(self, *args, **kwargs):
+        self.effective_price = self.get_effective_price()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and self.PRICE_FIELDS.intersection(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'effective_price'}
+        super().save(*args, **kwargs)
+
     class Meta:
         # Ensure deterministic ordering for pagination and listings
         ordering = ['-id']
+        constraints = [
+            # Checkout reserves stock with a conditional UPDATE; this is the backstop against overselling
+            models.CheckConstraint(check=Q(stock__isnull=True) | Q(stock__gte=0), name='catalog_product_stock_non_negative'),
+        ]
+
+    @staticmethod
+    def refresh_primary_images(product_ids=None):
+        """Re-resolve primary_image for the given products (all when None) in one UPDATE."""
+        qs = Product.objects.all() if product_ids is None else Product.objects.filter(pk__in=product_ids)
+        return qs.update(primary_image=Subquery(
+            ProductImage.objects.filter(product_id=OuterRef('pk'), is_main=True).order_by('id').values('id')[:1]
+        ))
+
+
+class ProductSpec(models.Model):
+    """One label/value pair of Product.specs, denormalized for filtering and facet counts."""
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='spec_values')
+    key = models.CharField(max_length=255)
+    value = models.CharField(max_length=255)
+
+    class Meta:
+        indexes = [models.Index(fields=['key', 'value'])]
+
+    def __str__(self):
+        return f"{self.key}: {self.value}"
+
+    @staticmethod
+    def pairs_from_specs(specs):
+        pairs = []
+        for item in specs or []:
+            if not isinstance(item, dict):
+                continue
+            key = str(item.get('label') or '').strip()[:255]
+            value = str(item.get('value') or '').strip()[:255]
+            if key and value:
+                pairs.append((key, value))
+        return pairs
+
+    @classmethod
+    def sync_product(cls, product):
+        cls.objects.filter(product_id=product.pk).delete()
+        cls.objects.bulk_create([
+            cls(product_id=product.pk, key=key, value=value)
+            for key, value in cls.pairs_from_specs(product.specs)
+        ])
 
 
 class ProductImage(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='images')
     image = models.ImageField(upload_to='products/images/')
+    # Resized derivatives of `image`, maintained by catalog.images
+    variants = models.JSONField(default=dict, blank=True, editable=False)
     is_main = models.BooleanField(default=False)
 
     def __str__(self):
         return f"Image for {self.product_id}"
+
+
+class StockForecast(models.Model):
+    """
+    Sales velocity and projected stock-out for a product with stock tracking,
+    written in one batch by the orders.forecast_stock job (orders.forecasting).
+    """
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, primary_key=True, related_name='forecast')
+    stock = models.IntegerField()
+    units_sold = models.PositiveIntegerField(default=0)
+    # Units per day, weighted towards recent days
+    daily_velocity = models.FloatField(default=0)
+    # Empty when the product is not selling (no projected stock-out)
+    days_of_cover = models.FloatField(null=True, blank=True, db_index=True)
+    # Empty as well when the stock-out is more than ten years away
+    stockout_date = models.DateField(null=True, blank=True)
+    computed_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"Forecast for {self.product_id}"
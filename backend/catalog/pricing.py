@@ -0,0 +1,164 @@
+"""
+Pricing engine.
+
+Every product has a price table: the base price, the price after the product
+discount and the price for approved students. Tables are precomputed when a
+product is saved and cached under the product's version stamp
+(``catalog.product:<pk>``), so pricing by id needs no database access while
+the cache is warm; misses are filled with one query. Without a shared cache
+tables are always read from the database, so no worker prices from a table
+another one has replaced. Checkout, the quote
+endpoint and the product serializers all price through this module.
+"""
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+
+from depod_api.versioning import bump_version, cache_is_shared, get_versions
+from .models import Product
+
+TWO_PLACES = Decimal('0.01')
+
+# Columns a price table is built from
+TABLE_FIELDS = Product.PRICE_FIELDS | {'student_discount'}
+PRICING_FIELDS = ('id', 'price', 'discounted_price', 'discount', 'student_discount')
+
+
+def product_namespace(product_id):
+    return f'catalog.product:{product_id}'
+
+
+def _table_key(product_id, version):
+    return f'pricing:{product_id}:{version}'
+
+
+def is_student(user):
+    return bool(user and user.is_authenticated and user.student_status == 'approved')
+
+
+def build_price_table(product):
+    """
+    Pricing rules: the product discount (discounted_price) applies first,
+    then the student percentage on top of it for approved students.
+    """
+    base = Decimal(product.price)
+    discounted = Decimal(product.get_effective_price())
+    student = discounted
+    product_discount = product.discount if product.discount and product.discounted_price else None
+    student_discount = None
+    if product.student_discount:
+        student = (discounted * (Decimal('1.00') - Decimal(product.student_discount) / Decimal('100'))).quantize(TWO_PLACES)
+        student_discount = product.student_discount
+    return {
+        'base': base,
+        'discounted': discounted,
+        'student': student,
+        'product_discount': product_discount,
+        'student_discount': student_discount,
+    }
+
+
+def price_table(product):
+    """Price table of a loaded product, memoized on the instance while its price fields are unchanged."""
+    state = tuple(getattr(product, name) for name in sorted(TABLE_FIELDS))
+    memo = getattr(product, '_price_table', None)
+    if memo is None or memo[0] != state:
+        memo = (state, build_price_table(product))
+        product._price_table = memo
+    return memo[1]
+
+
+def store_price_table(product):
+    """Precompute ``product``'s table for the version its (committing) save creates."""
+    table = build_price_table(product)
+    bump_version(
+        product_namespace(product.pk),
+        on_bump=lambda version: cache.set(_table_key(product.pk, version), table, settings.CATALOG_CACHE_TIMEOUT),
+    )
+
+
+def invalidate_price_table(product_id):
+    bump_version(product_namespace(product_id))
+
+
+def get_price_tables(product_ids):
+    """``{product_id: table}`` for existing products; two cache round trips and at most one query."""
+    ids = set(product_ids)
+    if not cache_is_shared():
+        return {
+            product.pk: build_price_table(product)
+            for product in Product.objects.only(*PRICING_FIELDS).filter(pk__in=ids)
+        }
+    versions = get_versions([product_namespace(pk) for pk in ids])
+    keys = {_table_key(pk, versions[product_namespace(pk)]): pk for pk in ids}
+    found = cache.get_many(keys.keys())
+    tables = {keys[key]: table for key, table in found.items()}
+
+    misses = ids - tables.keys()
+    if misses:
+        fresh = {}
+        for product in Product.objects.only(*PRICING_FIELDS).filter(pk__in=misses):
+            table = tables[product.pk] = build_price_table(product)
+            fresh[_table_key(product.pk, versions[product_namespace(product.pk)])] = table
+        cache.set_many(fresh, settings.CATALOG_CACHE_TIMEOUT)
+    return tables
+
+
+def line_from_table(table, quantity, student=False):
+    """Priced line (Decimal prices) for ``quantity`` units at ``table``."""
+    unit_price = table['student'] if student else table['discounted']
+    return {
+        'original_price': table['base'],
+        'unit_price': unit_price,
+        'product_discount': table['product_discount'],
+        'student_discount': table['student_discount'] if student else None,
+        'quantity': quantity,
+        'subtotal': (unit_price * quantity).quantize(TWO_PLACES),
+    }
+
+
+def price_line(product, quantity, student=False):
+    return line_from_table(price_table(product), quantity, student)
+
+
+def price_lines(lines, student=False):
+    """
+    Batch API: price many ``(product_id, quantity)`` lines in one call.
+    Returns ``(priced, missing)``; priced lines keep request order and carry
+    ``product_id``, unknown ids are listed in ``missing``.
+    """
+    tables = get_price_tables(pid for pid, _ in lines)
+    priced = []
+    missing = []
+    for product_id, quantity in lines:
+        table = tables.get(product_id)
+        if table is None:
+            missing.append(product_id)
+            continue
+        line = line_from_table(table, quantity, student)
+        line['product_id'] = product_id
+        priced.append(line)
+    return priced, missing
+
+
+def quote(lines, user=None):
+    """
+    Price a cart for ``user``. Returns ``{'is_student', 'lines', 'total', 'missing'}``;
+    prices come from the price tables, names and availability from one query.
+    """
+    student = is_student(user)
+    info = {
+        row['id']: row
+        for row in Product.objects.filter(pk__in={pid for pid, _ in lines}).values('id', 'name', 'in_stock', 'stock')
+    }
+    priced, missing = price_lines([(pid, qty) for pid, qty in lines if pid in info], student)
+    missing += [pid for pid, _ in lines if pid not in info]
+    total = Decimal('0.00')
+    for line in priced:
+        row = info[line['product_id']]
+        line['name'] = row['name']
+        line['in_stock'] = row['in_stock']
+        line['available'] = row['in_stock'] and (row['stock'] is None or row['stock'] >= line['quantity'])
+        total += line['subtotal']
+    return {'is_student': student, 'lines': priced, 'total': total, 'missing': missing}
@@ -0,0 +1,108 @@
+"""
+Full-text product search.
+
+PostgreSQL: ``catalog_product.search_vector`` is a stored generated tsvector
+(name > description > string values of specs/features) with a GIN index.
+SQLite (USE_SQLITE=1): ``catalog_product_fts`` is an FTS5 shadow table keyed
+by product id, kept in sync from Product save/delete signals (triggers would
+be lost whenever SQLite rebuilds the product table during a migration). Both
+are created by migration 0006_product_search; ``rebuild_search_index``
+repopulates the FTS5 table.
+
+Queries are reduced to word tokens and every token must match as a prefix,
+so results are the same on both backends and user input never reaches the
+query syntax of either engine.
+"""
+import re
+
+from django.db import connection
+from django.db.models import BooleanField, FloatField
+from django.db.models.expressions import RawSQL
+
+# Ranking weights: name, description, specs/features text
+FTS_WEIGHTS = (10.0, 4.0, 2.0)
+MAX_TERMS = 8
+
+# Fields whose changes require re-indexing
+INDEXED_FIELDS = frozenset({'name', 'description', 'specs', 'features'})
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+SQLITE_INDEX_SQL = (
+    "INSERT INTO catalog_product_fts(rowid, name, description, attrs) "
+    "SELECT id, name, description, "
+    "coalesce((SELECT group_concat(value, ' ') FROM json_tree(p.specs) WHERE type = 'text'), '') || ' ' || "
+    "coalesce((SELECT group_concat(value, ' ') FROM json_tree(p.features) WHERE type = 'text'), '') "
+    "FROM catalog_product p"
+)
+
+
+def update_search_index(product_ids=None):
+    """
+    Re-index the given products (all when None) in the SQLite FTS5 table.
+    No-op on PostgreSQL, where the search vector is a generated column.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        if product_ids is None:
+            cursor.execute("DELETE FROM catalog_product_fts")
+            cursor.execute(SQLITE_INDEX_SQL)
+            return
+        ids = [int(pk) for pk in product_ids]
+        if not ids:
+            return
+        placeholders = ', '.join(['%s'] * len(ids))
+        cursor.execute(f"DELETE FROM catalog_product_fts WHERE rowid IN ({placeholders})", ids)
+        cursor.execute(f"{SQLITE_INDEX_SQL} WHERE p.id IN ({placeholders})", ids)
+
+
+def search_terms(q):
+    return _TOKEN_RE.findall((q or '').lower())[:MAX_TERMS]
+
+
+def _search_postgres(queryset, terms):
+    tsquery = ' & '.join(f'{t}:*' for t in terms)
+    return (
+        queryset
+        .filter(RawSQL(
+            "catalog_product.search_vector @@ to_tsquery('simple', %s)", [tsquery], output_field=BooleanField()
+        ))
+        .annotate(rank=RawSQL(
+            "ts_rank_cd(catalog_product.search_vector, to_tsquery('simple', %s))", [tsquery], output_field=FloatField()
+        ))
+        .order_by('-rank', '-id')
+    )
+
+
+def _search_sqlite(queryset, terms):
+    match = ' AND '.join(f'"{t}"*' for t in terms)
+    weights = ', '.join(str(w) for w in FTS_WEIGHTS)
+    # Join the FTS table so MATCH runs once per query and bm25() is read from
+    # the joined row (a correlated subquery would repeat the MATCH per product)
+    return (
+        queryset
+        .extra(
+            tables=['catalog_product_fts'],
+            where=['catalog_product_fts MATCH %s', 'catalog_product_fts.rowid = catalog_product.id'],
+            params=[match],
+        )
+        # bm25() is lower for better matches; negate so that ordering matches Postgres
+        .annotate(rank=RawSQL(f"-bm25(catalog_product_fts, {weights})", [], output_field=FloatField()))
+        .order_by('-rank', '-id')
+    )
+
+
+def search_products(queryset, q):
+    """Filter ``queryset`` to products matching ``q``, best matches first."""
+    terms = search_terms(q)
+    if not terms:
+        return queryset.none()
+    if connection.vendor == 'postgresql':
+        return _search_postgres(queryset, terms)
+    if connection.vendor == 'sqlite':
+        return _search_sqlite(queryset, terms)
+    # Other backends: unranked substring match on the name
+    for term in terms:
+        queryset = queryset.filter(name__icontains=term)
+    return queryset
@@ -1,13 +1,22 @@
+from django.utils.html import strip_tags
+from django.utils.text import Truncator
 from rest_framework import serializers
 from .models import Category, Product, ProductImage
+from .images import variant_urls
+from .pricing import price_table
+from depod_api.serializers import SparseFieldsetMixin
+
+
+SHORT_DESCRIPTION_LENGTH = 160
 
 
 class CategorySerializer(serializers.ModelSerializer):
     image = serializers.SerializerMethodField()
+    image_srcset = serializers.SerializerMethodField()
 
     class Meta:
         model = Category
-        fields = ['id', 'key', 'name', 'description', 'image']
+        fields = ['id', 'key', 'name', 'description', 'image', 'image_srcset']
 
     def get_image(self, obj):
         request = self.context.get('request')
@@ -18,13 +27,17 @@ class CategorySerializer(serializers.ModelSerializer):
             return url
         return None
 
+    def get_image_srcset(self, obj):
+        return variant_urls(obj.image, obj.image_variants, self.context.get('request'))
+
 
 class ProductImageSerializer(serializers.ModelSerializer):
     image = serializers.SerializerMethodField()
+    srcset = serializers.SerializerMethodField()
 
     class Meta:
         model = ProductImage
-        fields = ['image', 'is_main']
+        fields = ['image', 'srcset', 'is_main']
 
     def get_image(self, obj):
         request = self.context.get('request')
@@ -33,20 +46,27 @@ class ProductImageSerializer(serializers.ModelSerializer):
             return request.build_absolute_uri(url)
         return url
 
+    def get_srcset(self, obj):
+        return variant_urls(obj.image, obj.variants, self.context.get('request'))
+
 
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     images = ProductImageSerializer(many=True, read_only=True)
     main_image = serializers.SerializerMethodField()
+    main_image_srcset = serializers.SerializerMethodField()
     category = serializers.SerializerMethodField()
     # Add camelCase field for frontend compatibility
     studentDiscount = serializers.IntegerField(source='student_discount', read_only=True)
+    # Final prices from the pricing engine (after product discount / for approved students)
+    final_price = serializers.SerializerMethodField()
+    student_price = serializers.SerializerMethodField()
 
     class Meta:
         model = Product
         fields = [
-            'id', 'name', 'category', 'description', 'images', 'main_image',
+            'id', 'name', 'category', 'description', 'images', 'main_image', 'main_image_srcset',
             'specs', 'features', 'highlights', 'price', 'discounted_price',
-            'discount', 'student_discount', 'studentDiscount', 'in_stock', 'stock'
+            'discount', 'student_discount', 'studentDiscount', 'final_price', 'student_price', 'in_stock', 'stock'
         ]
 
     def get_main_image(self, obj):
@@ -56,8 +76,8 @@ class ProductSerializer(serializers.ModelSerializer):
             if request is not None:
                 return request.build_absolute_uri(url)
             return url
-        # fallback to main ProductImage
-        main = obj.images.filter(is_main=True).first()
+        # fallback to main ProductImage (denormalized, select_related by the views)
+        main = obj.primary_image
         if main:
             url = main.image.url
             if request is not None:
@@ -65,14 +85,94 @@ class ProductSerializer(serializers.ModelSerializer):
             return url
         return None
 
+    def get_main_image_srcset(self, obj):
+        request = self.context.get('request')
+        if obj.main_image:
+            return variant_urls(obj.main_image, obj.main_image_variants, request)
+        # fallback to main ProductImage
+        main = obj.primary_image
+        if main:
+            return variant_urls(main.image, main.variants, request)
+        return None
+
     def get_category(self, obj):
         return {'key': obj.category.key, 'name': obj.category.name}
 
+    def get_final_price(self, obj):
+        return f"{price_table(obj)['discounted']:.2f}"
+
+    def get_student_price(self, obj):
+        return f"{price_table(obj)['student']:.2f}"
+
+
+class ProductListingSerializer(ProductSerializer):
+    """
+    Full representation in listings and search. The stock count is left out:
+    cached listings are only invalidated when ``in_stock`` changes, not on
+    every sale (see catalog.cache.stock_namespace).
+    """
+
+    class Meta(ProductSerializer.Meta):
+        fields = [f for f in ProductSerializer.Meta.fields if f != 'stock']
+
+
+class ProductCardSerializer(ProductListingSerializer):
+    """Slim listing representation: what a product card renders."""
+    # Plain-text teaser of the (rich text) description for the card's two-line excerpt
+    short_description = serializers.SerializerMethodField()
+
+    class Meta(ProductListingSerializer.Meta):
+        fields = [
+            'id', 'name', 'category', 'short_description', 'main_image', 'main_image_srcset', 'price',
+            'discounted_price', 'discount', 'student_discount', 'studentDiscount', 'final_price', 'student_price',
+            'in_stock'
+        ]
+
+    def get_short_description(self, obj):
+        return Truncator(' '.join(strip_tags(obj.description).split())).chars(SHORT_DESCRIPTION_LENGTH)
+
 
 class ProductPricingSerializer(serializers.ModelSerializer):
     # Add camelCase field for frontend compatibility
     studentDiscount = serializers.IntegerField(source='student_discount', read_only=True)
+    final_price = serializers.SerializerMethodField()
+    student_price = serializers.SerializerMethodField()
     
     class Meta:
         model = Product
-        fields = ['price', 'discounted_price', 'discount', 'student_discount', 'studentDiscount', 'in_stock']
+        fields = ['price', 'discounted_price', 'discount', 'student_discount', 'studentDiscount', 'final_price', 'student_price', 'in_stock']
+
+    def get_final_price(self, obj):
+        return f"{price_table(obj)['discounted']:.2f}"
+
+    def get_student_price(self, obj):
+        return f"{price_table(obj)['student']:.2f}"
+
+
+class QuoteLineSerializer(serializers.Serializer):
+    product_id = serializers.IntegerField(min_value=1)
+    quantity = serializers.IntegerField(min_value=1, default=1)
+
+
+class PricingQuoteSerializer(serializers.Serializer):
+    lines = QuoteLineSerializer(many=True, allow_empty=False, max_length=100)
+
+
+class QuotedLineSerializer(serializers.Serializer):
+    product_id = serializers.IntegerField()
+    name = serializers.CharField()
+    quantity = serializers.IntegerField()
+    original_price = serializers.DecimalField(max_digits=12, decimal_places=2)
+    unit_price = serializers.DecimalField(max_digits=12, decimal_places=2)
+    subtotal = serializers.DecimalField(max_digits=12, decimal_places=2)
+    product_discount = serializers.IntegerField(allow_null=True)
+    student_discount = serializers.IntegerField(allow_null=True)
+    in_stock = serializers.BooleanField()
+    available = serializers.BooleanField()
+
+
+class PricingQuoteResultSerializer(serializers.Serializer):
+    is_student = serializers.BooleanField()
+    lines = QuotedLineSerializer(many=True)
+    total = serializers.DecimalField(max_digits=12, decimal_places=2)
+    missing = serializers.ListField(child=serializers.IntegerField())
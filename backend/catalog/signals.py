@@ -0,0 +1,84 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Category, Product, ProductImage, ProductSpec
+from .cache import bump_catalog_version
+from .images import sync_variants, delete_variants
+from .search import INDEXED_FIELDS, update_search_index
+from .pricing import TABLE_FIELDS, invalidate_price_table, store_price_table
+
+# model -> (image field, variants field)
+IMAGE_FIELDS = {
+    Category: ('image', 'image_variants'),
+    Product: ('main_image', 'main_image_variants'),
+    ProductImage: ('image', 'variants'),
+}
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+def catalog_changed(sender, **kwargs):
+    """Any catalog write invalidates cached catalog responses."""
+    bump_catalog_version()
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def sync_search_index(sender, instance, update_fields=None, **kwargs):
+    """Keep the SQLite FTS5 table in step with product text."""
+    if update_fields is not None and not INDEXED_FIELDS.intersection(update_fields):
+        return
+    update_search_index([instance.pk])
+
+
+@receiver(post_save, sender=Product)
+def sync_spec_values(sender, instance, update_fields=None, **kwargs):
+    """Mirror Product.specs into ProductSpec rows used for filters and facets."""
+    if update_fields is not None and 'specs' not in update_fields:
+        return
+    ProductSpec.sync_product(instance)
+
+
+@receiver(post_save, sender=Product)
+def refresh_price_table(sender, instance, update_fields=None, **kwargs):
+    """Precompute the product's price table (see catalog.pricing)."""
+    if update_fields is not None and not TABLE_FIELDS.intersection(update_fields):
+        return
+    store_price_table(instance)
+
+
+@receiver(post_delete, sender=Product)
+def drop_price_table(sender, instance, **kwargs):
+    invalidate_price_table(instance.pk)
+
+
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+def sync_primary_image(sender, instance, **kwargs):
+    """Keep Product.primary_image pointing at the product's first is_main image."""
+    Product.refresh_primary_images([instance.product_id])
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=ProductImage)
+def build_image_variants(sender, instance, update_fields=None, **kwargs):
+    """Render resized derivatives when an image is uploaded or replaced."""
+    field_name, variants_field = IMAGE_FIELDS[sender]
+    if update_fields is not None and field_name not in update_fields:
+        return
+    sync_variants(instance, field_name, variants_field)
+
+
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Product)
+@receiver(post_delete, sender=ProductImage)
+def remove_image_variants(sender, instance, **kwargs):
+    field_name, variants_field = IMAGE_FIELDS[sender]
+    storage = getattr(instance, field_name).storage
+    variants = getattr(instance, variants_field)
+    transaction.on_commit(lambda: delete_variants(storage, variants))
@@ -1,11 +1,12 @@
 from rest_framework.routers import DefaultRouter
 from django.urls import path, include
-from .views import CategoryViewSet, ProductViewSet
+from .views import CategoryViewSet, ProductViewSet, PricingQuoteView
 
 router = DefaultRouter()
 router.register(r'categories', CategoryViewSet, basename='category')
 router.register(r'products', ProductViewSet, basename='product')
 
 urlpatterns = [
+    path('pricing/quote/', PricingQuoteView.as_view(), name='pricing-quote'),
     path('', include(router.urls)),
 ]
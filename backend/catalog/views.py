@@ -1,34 +1,130 @@
-from rest_framework import viewsets, decorators, response
+from rest_framework import viewsets, decorators, response, views
 from rest_framework.permissions import AllowAny
 from .models import Category, Product
-from .serializers import CategorySerializer, ProductSerializer, ProductPricingSerializer
+from .serializers import (
+    CategorySerializer, ProductSerializer, ProductListingSerializer, ProductCardSerializer, ProductPricingSerializer,
+    PricingQuoteSerializer, PricingQuoteResultSerializer,
+)
+from .cache import CatalogCacheMixin, cached_catalog_response, stock_namespace
+from .search import search_products
+from .filters import filter_products, product_facets
+from .pricing import quote
+from depod_api.serializers import selected_fields
 
 
-class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
+class CategoryViewSet(CatalogCacheMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Category.objects.all().order_by('order_index', 'id')
     serializer_class = CategorySerializer
     permission_classes = [AllowAny]
 
 
-class ProductViewSet(viewsets.ReadOnlyModelViewSet):
+class ProductViewSet(CatalogCacheMixin, viewsets.ReadOnlyModelViewSet):
     serializer_class = ProductSerializer
     permission_classes = [AllowAny]
+    # Large columns that are only loaded when the response includes them
+    deferrable_fields = ('description', 'specs', 'features', 'highlights')
+    # Serializer fields computed from one of those columns
+    derived_fields = {'short_description': 'description'}
+    # Upper bound on ?ids= for the batch endpoint
+    batch_max_ids = 50
+
+    def get_serializer_class(self):
+        # Listings default to the card representation; ?view=full or ?fields= select from the full one
+        params = self.request.query_params
+        if self.action in ('list', 'search'):
+            if params.get('view') != 'full' and 'fields' not in params:
+                return ProductCardSerializer
+            return ProductListingSerializer
+        return ProductSerializer
+
+    def get_cache_namespaces(self):
+        # The detail includes the stock count, which changes with every sale
+        pk = str(self.kwargs.get(self.lookup_url_kwarg or self.lookup_field, ''))
+        if self.action == 'retrieve' and pk.isdigit():
+            return [stock_namespace(int(pk))]
+        return ()
 
     def get_queryset(self):
+        output = set(selected_fields(self.get_serializer_class().Meta.fields, self.request))
+        output |= {self.derived_fields[f] for f in output if f in self.derived_fields}
         # Ensure deterministic ordering for pagination
         qs = (
             Product.objects.all()
             .order_by('-id')
-            .select_related('category')
-            .prefetch_related('images')
+            .select_related('category', 'primary_image')
+            .defer(*[f for f in self.deferrable_fields if f not in output])
         )
+        if 'images' in output:
+            qs = qs.prefetch_related('images')
         category_key = self.request.query_params.get('category')
         if category_key:
             qs = qs.filter(category__key=category_key)
-        return qs
+        return filter_products(qs, self.request.query_params)
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        if self.action == 'list':
+            response.data['facets'] = product_facets(self.get_queryset())
+        return response
+
+    @decorators.action(detail=False, methods=['get'], url_path='search', permission_classes=[AllowAny])
+    def search(self, request):
+        """Ranked full-text search over name, description and specs/features text (?q=)."""
+        q = (request.query_params.get('q') or '').strip()
+        if not q:
+            return response.Response({'detail': 'q parametri tələb olunur'}, status=400)
+
+        def render():
+            qs = search_products(self.get_queryset(), q)
+            page = self.paginate_queryset(qs)
+            if page is not None:
+                return self.get_paginated_response(self.get_serializer(page, many=True).data)
+            return response.Response(self.get_serializer(qs, many=True).data)
+        return cached_catalog_response(request, render)
+
+    @decorators.action(detail=False, methods=['get'], url_path='batch', permission_classes=[AllowAny])
+    def batch(self, request):
+        """Several products in one query (?ids=1,2,3), keyed by id; unknown ids are listed in `missing`."""
+        try:
+            ids = list(dict.fromkeys(
+                int(part) for part in (request.query_params.get('ids') or '').split(',') if part.strip()
+            ))
+        except ValueError:
+            return response.Response({'detail': 'ids vergüllə ayrılmış tam ədədlər olmalıdır'}, status=400)
+        if not ids:
+            return response.Response({'detail': 'ids parametri tələb olunur'}, status=400)
+        if len(ids) > self.batch_max_ids:
+            return response.Response({'detail': f'Ən çox {self.batch_max_ids} məhsul istənilə bilər'}, status=400)
+
+        def render():
+            products = list(self.get_queryset().filter(id__in=ids))
+            data = dict(zip([p.id for p in products], self.get_serializer(products, many=True).data))
+            return response.Response({
+                'results': {str(pk): data[pk] for pk in ids if pk in data},
+                'missing': [pk for pk in ids if pk not in data],
+            })
+        return cached_catalog_response(request, render, [stock_namespace(pk) for pk in ids])
 
     @decorators.action(detail=True, methods=['get'], url_path='pricing', permission_classes=[AllowAny])
     def pricing(self, request, pk=None):
-        product = self.get_object()
-        ser = ProductPricingSerializer(product)
-        return response.Response(ser.data)
+        def render():
+            product = self.get_object()
+            ser = ProductPricingSerializer(product)
+            return response.Response(ser.data)
+        return cached_catalog_response(request, render)
+
+
+class PricingQuoteView(views.APIView):
+    """
+    Price a whole cart at once: POST {"lines": [{"product_id", "quantity"}, ...]}.
+    Uses the checkout pricing rules, including student pricing for approved
+    students; anonymous callers get regular prices.
+    """
+    permission_classes = [AllowAny]
+
+    def post(self, request):
+        ser = PricingQuoteSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+        lines = [(line['product_id'], line['quantity']) for line in ser.validated_data['lines']]
+        result = quote(lines, request.user)
+        return response.Response(PricingQuoteResultSerializer(result).data)
@@ -1,6 +1,6 @@
 from django.contrib import admin
 from unfold.admin import ModelAdmin
-from depod_api.admin_mixins import RichTextAdminMixin
+from depod_api.admin_mixins import LargeTableAdminMixin, RichTextAdminMixin
 from .models import SiteSettings, AboutContent, ContactContent, ContactMessage
 from .forms import AboutAdminForm, ContactAdminForm
 
@@ -37,7 +37,7 @@ class ContactContentAdmin(RichTextAdminMixin, ModelAdmin):
 
 
 @admin.register(ContactMessage)
-class ContactMessageAdmin(ModelAdmin):
+class ContactMessageAdmin(LargeTableAdminMixin, ModelAdmin):
     list_display = ("id", "first_name", "last_name", "email", "phone", "subject", "created_at")
     search_fields = ("first_name", "last_name", "email", "phone", "subject")
     list_filter = ("created_at",)
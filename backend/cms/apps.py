@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class CmsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'cms'
+
+    def ready(self):
+        # Import signals to connect handlers
+        from . import signals  # noqa: F401
@@ -0,0 +1,20 @@
+# Trigram indexes for the admin search_fields (PostgreSQL only, see depod_api.search_indexes)
+
+from django.db import migrations
+
+from depod_api.search_indexes import trigram_indexes
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('cms', '0003_sitesettings_add_legal_pdfs'),
+    ]
+
+    operations = [
+        trigram_indexes('cms_contactmessage', ['first_name', 'last_name', 'email', 'phone', 'subject']),
+        trigram_indexes('cms_aboutcontent', ['title']),
+        trigram_indexes('cms_contactcontent', ['hero_title']),
+    ]
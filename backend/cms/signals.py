@@ -0,0 +1,15 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from depod_api.versioning import bump_version
+from .models import SiteSettings, AboutContent, ContactContent
+
+
+@receiver(post_save, sender=SiteSettings)
+@receiver(post_delete, sender=SiteSettings)
+@receiver(post_save, sender=AboutContent)
+@receiver(post_delete, sender=AboutContent)
+@receiver(post_save, sender=ContactContent)
+@receiver(post_delete, sender=ContactContent)
+def content_changed(sender, **kwargs):
+    """Advance the per-model version stamp used for ETag/Last-Modified."""
+    bump_version(sender._meta.label_lower)
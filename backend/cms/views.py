@@ -2,6 +2,7 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
 from django.shortcuts import get_object_or_404
+from depod_api.versioning import conditional_get
 from .models import SiteSettings, AboutContent, ContactContent, ContactMessage
 from .serializers import SocialLinksSerializer, FooterSerializer, AboutSerializer, ContactSerializer, ContactMessageSerializer, HomeSettingsSerializer
 
@@ -9,6 +10,7 @@ from .serializers import SocialLinksSerializer, FooterSerializer, AboutSerialize
 class SocialLinksView(APIView):
     permission_classes = [AllowAny]
 
+    @conditional_get('cms.sitesettings')
     def get(self, request):
         obj = SiteSettings.objects.first()
         if not obj:
@@ -19,6 +21,7 @@ class SocialLinksView(APIView):
 class LegalDocsView(APIView):
     permission_classes = [AllowAny]
 
+    @conditional_get('cms.sitesettings')
     def get(self, request):
         obj = SiteSettings.objects.first()
         if not obj:
@@ -38,6 +41,7 @@ class LegalDocsView(APIView):
 class FooterView(APIView):
     permission_classes = [AllowAny]
 
+    @conditional_get('cms.sitesettings')
     def get(self, request):
         obj = SiteSettings.objects.first()
         if not obj:
@@ -54,6 +58,7 @@ class FooterView(APIView):
 class HomeSettingsView(APIView):
     permission_classes = [AllowAny]
 
+    @conditional_get('cms.sitesettings')
     def get(self, request):
         obj = SiteSettings.objects.first()
         if not obj:
@@ -64,6 +69,7 @@ class HomeSettingsView(APIView):
 class AboutView(APIView):
     permission_classes = [AllowAny]
 
+    @conditional_get('cms.aboutcontent')
     def get(self, request):
         obj = AboutContent.objects.first()
         if not obj:
@@ -74,6 +80,7 @@ class AboutView(APIView):
 class ContactView(APIView):
     permission_classes = [AllowAny]
 
+    @conditional_get('cms.contactcontent')
     def get(self, request):
         obj = ContactContent.objects.first()
         if not obj:
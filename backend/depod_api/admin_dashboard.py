@@ -1,280 +1,217 @@
-from django.urls import path
-from django.contrib import admin
+from collections import defaultdict
+from datetime import date, timedelta
+
+from django.conf import settings
 from django.contrib.admin.views.decorators import staff_member_required
+from django.db.models import BooleanField, Case, DateField, F, Q, Sum, Value, When
+from django.db.models.functions import TruncMonth
 from django.http import JsonResponse
-from django.db.models import Sum, Count, F, Q
-from django.db.models.functions import TruncDate, TruncWeek, TruncMonth
 from django.utils import timezone
-from datetime import datetime, timedelta
-from orders.models import Order, OrderItem
-from catalog.models import Product, Category
-from accounts.models import User
-import json
 
+from catalog.models import StockForecast
+from orders.analytics import sales_report
+from orders.models import DailySalesRollup, Order
 
-@staff_member_required
-def monthly_profit_data(request):
-    """Monthly profit chart data (price - cost_price) - only delivered orders."""
-    # Get orders from last 12 months
-    twelve_months_ago = timezone.now() - timedelta(days=365)
-    
-    # Calculate monthly profit from order items - only delivered orders
-    monthly_data = (
-        OrderItem.objects
-        .filter(
-            order__created_at__gte=twelve_months_ago,
-            order__status='delivered'
-        )
-        .annotate(month=TruncMonth('order__created_at'))
-        .values('month')
-        .annotate(
-            total_revenue=Sum('subtotal'),
-            total_cost=Sum(F('quantity') * F('product__cost_price'))
-        )
-        .annotate(profit=F('total_revenue') - F('total_cost'))
-        .order_by('month')
-    )
-    
-    # Format data for Chart.js
-    labels = []
-    profits = []
-    
-    for data in monthly_data:
-        if data['month']:
-            labels.append(data['month'].strftime('%Y-%m'))
-            profits.append(float(data['profit'] or 0))
-    
-    return JsonResponse({
-        'labels': labels,
-        'datasets': [{
-            'label': 'Mənfəət',
-            'data': profits,
-            'backgroundColor': 'rgba(59, 130, 246, 0.5)',
-            'borderColor': 'rgb(59, 130, 246)',
-            'borderWidth': 1
-        }]
-    })
 
+# Trend charts default to the last 7 days; ranges longer than this are refused
+DEFAULT_RANGE_DAYS = 7
+MAX_RANGE_DAYS = 3 * 366
+CATEGORY_COLORS = [
+    '#3B82F6', '#EF4444', '#10B981', '#F59E0B', '#8B5CF6',
+    '#06B6D4', '#84CC16', '#F97316', '#EC4899', '#6B7280'
+]
 
-@staff_member_required
-def sales_units_data(request):
-    """Daily, weekly, and monthly unit sales data - only delivered orders."""
-    now = timezone.now()
-    
-    # Daily sales (today) - only delivered orders
-    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-    daily_sales = OrderItem.objects.filter(
-        order__created_at__gte=today_start,
-        order__status='delivered'
-    ).aggregate(total=Sum('quantity'))['total'] or 0
-    
-    # Weekly sales (last 7 days) - only delivered orders
-    week_start = now - timedelta(days=7)
-    weekly_sales = OrderItem.objects.filter(
-        order__created_at__gte=week_start,
-        order__status='delivered'
-    ).aggregate(total=Sum('quantity'))['total'] or 0
-    
-    # Monthly sales (last 30 days) - only delivered orders
-    month_start = now - timedelta(days=30)
-    monthly_sales = OrderItem.objects.filter(
-        order__created_at__gte=month_start,
-        order__status='delivered'
-    ).aggregate(total=Sum('quantity'))['total'] or 0
-    
-    # Daily chart data (last 7 days) - only delivered orders
-    daily_chart_data = []
-    daily_labels = []
-    
-    for i in range(7):
-        day = now - timedelta(days=6-i)
-        day_start = day.replace(hour=0, minute=0, second=0, microsecond=0)
-        day_end = day_start + timedelta(days=1)
-        
-        day_sales = OrderItem.objects.filter(
-            order__created_at__gte=day_start,
-            order__created_at__lt=day_end,
-            order__status='delivered'
-        ).aggregate(total=Sum('quantity'))['total'] or 0
-        
-        daily_chart_data.append(day_sales)
-        daily_labels.append(day.strftime('%m/%d'))
-    
-    return JsonResponse({
-        'daily': daily_sales,
-        'weekly': weekly_sales,
-        'monthly': monthly_sales,
-        'daily_chart': {
-            'labels': daily_labels,
-            'datasets': [{
-                'label': 'Satış',
-                'data': daily_chart_data,
-                'backgroundColor': 'rgba(16, 185, 129, 0.5)',
-                'borderColor': 'rgb(16, 185, 129)',
-                'borderWidth': 1
-            }]
-        }
-    })
+
+def _parse_range(request, today):
+    """``(start, end)`` dates from ``?from=&to=`` (ISO dates, inclusive), or an error message."""
+    try:
+        end = date.fromisoformat(request.GET['to']) if request.GET.get('to') else today
+        start = (
+            date.fromisoformat(request.GET['from']) if request.GET.get('from')
+            else end - timedelta(days=DEFAULT_RANGE_DAYS - 1)
+        )
+    except ValueError:
+        return None, None, 'from/to YYYY-MM-DD formatında olmalıdır'
+    if start > end:
+        return None, None, 'from tarixi to tarixindən sonra ola bilməz'
+    if (end - start).days >= MAX_RANGE_DAYS:
+        return None, None, f'Tarix aralığı {MAX_RANGE_DAYS} gündən çox ola bilməz'
+    return start, end, None
 
 
-@staff_member_required
-def category_distribution_data(request):
-    """Category distribution pie chart data - only delivered orders."""
-    # Get sales by category - only delivered orders
-    category_data = (
-        OrderItem.objects
-        .filter(order__status='delivered')
-        .values('product__category__name')
-        .annotate(total_quantity=Sum('quantity'))
-        .order_by('-total_quantity')
+def _sales_totals(today, start, end):
+    """
+    One GROUP BY over the whole rollup for every sales widget. Days of the
+    chart range ``start..end`` are grouped per day, all other days per month,
+    so the result stays a few rows per month and category; the today/7/30 day
+    windows are conditional sums.
+    """
+    windows = {
+        'today': Q(date=today),
+        'week': Q(date__gt=today - timedelta(days=7)),
+        'month': Q(date__gt=today - timedelta(days=30)),
+    }
+    in_range = Q(date__range=(start, end))
+    return (
+        DailySalesRollup.objects
+        .annotate(
+            in_range=Case(When(in_range, then=Value(True)), default=Value(False), output_field=BooleanField()),
+            bucket=Case(When(in_range, then=F('date')), default=TruncMonth('date'), output_field=DateField()),
+        )
+        .values('in_range', 'bucket', 'category__name')
+        .annotate(
+            total_units=Sum('units'),
+            total_revenue=Sum('revenue'),
+            total_cost=Sum('cost'),
+            total_profit=Sum('profit'),
+            units_today=Sum('units', filter=windows['today']),
+            units_week=Sum('units', filter=windows['week']),
+            units_month=Sum('units', filter=windows['month']),
+            revenue_month=Sum('revenue', filter=windows['month']),
+            profit_month=Sum('profit', filter=windows['month']),
+        )
+        .order_by()
     )
-    
-    labels = []
-    data = []
-    
-    for item in category_data:
-        if item['product__category__name']:
-            labels.append(item['product__category__name'])
-            data.append(item['total_quantity'])
-    
-    return JsonResponse({
-        'labels': labels,
-        'datasets': [{
-            'data': data,
-            'backgroundColor': [
-                '#3B82F6', '#EF4444', '#10B981', '#F59E0B', '#8B5CF6',
-                '#06B6D4', '#84CC16', '#F97316', '#EC4899', '#6B7280'
-            ]
-        }]
-    })
 
 
-@staff_member_required
-def recent_orders_data(request):
-    """Recent orders table data."""
-    recent_orders = Order.objects.select_related('user').prefetch_related('items__product').order_by('-created_at')[:10]
-    
-    orders_data = []
-    for order in recent_orders:
-        # Get first product name (simplified)
-        first_product = order.items.first()
-        product_name = first_product.product.name if first_product else 'No items'
-        
-        orders_data.append({
+def _recent_orders():
+    recent_orders = Order.objects.select_related('user').order_by('-created_at')[:10]
+    return [
+        {
             'id': order.id,
             'customer_name': f"{order.user.first_name} {order.user.last_name}",
             'customer_email': order.user.email,
-            'product': product_name,
+            'product': order.first_item_name or 'No items',
             'total': float(order.total_price),
             'status': order.status,
             'status_display': order.get_status_display(),
             'created_at': order.created_at.strftime('%d.%m.%Y %H:%M')
-        })
-    
-    return JsonResponse({
-        'orders': orders_data
-    })
+        }
+        for order in recent_orders
+    ]
 
 
-@staff_member_required
-def revenue_widget_data(request):
-    """Total revenue widget data - only delivered orders."""
-    # Calculate total revenue from delivered orders only
-    total_revenue = Order.objects.filter(
-        status='delivered'
-    ).aggregate(
-        total=Sum('total_price')
-    )['total'] or 0
-    
-    # Revenue from last 30 days - only delivered orders
-    thirty_days_ago = timezone.now() - timedelta(days=30)
-    recent_revenue = Order.objects.filter(
-        created_at__gte=thirty_days_ago,
-        status='delivered'
-    ).aggregate(
-        total=Sum('total_price')
-    )['total'] or 0
-    
-    # Get revenue trend data for last 7 days - only delivered orders
-    now = timezone.now()
-    revenue_trend_data = []
-    revenue_trend_labels = []
-    
-    for i in range(6, -1, -1):  # Last 7 days
-        day = now - timedelta(days=i)
-        day_start = day.replace(hour=0, minute=0, second=0, microsecond=0)
-        day_end = day_start + timedelta(days=1)
-        
-        day_revenue = Order.objects.filter(
-            created_at__gte=day_start,
-            created_at__lt=day_end,
-            status='delivered'
-        ).aggregate(
-            total=Sum('total_price')
-        )['total'] or 0
-        
-        revenue_trend_data.append(float(day_revenue))
-        revenue_trend_labels.append(day.strftime('%d/%m'))
-    
-    return JsonResponse({
-        'total_revenue': float(total_revenue),
-        'recent_revenue': float(recent_revenue),
-        'currency': 'AZN',
-        'trend_chart': {
-            'labels': revenue_trend_labels,
-            'data': revenue_trend_data
+def _stockout_risks():
+    """Products expected to sell out within STOCK_LOW_COVER_DAYS days, soonest first."""
+    forecasts = (
+        StockForecast.objects
+        .filter(days_of_cover__lte=settings.STOCK_LOW_COVER_DAYS)
+        .select_related('product')
+        .order_by('days_of_cover', 'product_id')[:10]
+    )
+    return [
+        {
+            'product_id': forecast.product_id,
+            'product': forecast.product.name,
+            'stock': forecast.stock,
+            'daily_velocity': forecast.daily_velocity,
+            'days_of_cover': forecast.days_of_cover,
+            'stockout_date': forecast.stockout_date.strftime('%d.%m.%Y') if forecast.stockout_date else None,
         }
-    })
+        for forecast in forecasts
+    ]
 
 
 @staff_member_required
-def profit_widget_data(request):
-    """Total profit widget data (price - cost_price) - only delivered orders."""
-    from django.db.models import F
-    
-    # Calculate total profit from delivered order items only
-    total_profit = OrderItem.objects.filter(
-        order__status='delivered'
-    ).aggregate(
-        total=Sum(F('subtotal') - (F('quantity') * F('product__cost_price')))
-    )['total'] or 0
-    
-    # Profit from last 30 days - only delivered orders
-    thirty_days_ago = timezone.now() - timedelta(days=30)
-    recent_profit = OrderItem.objects.filter(
-        order__created_at__gte=thirty_days_ago,
-        order__status='delivered'
-    ).aggregate(
-        total=Sum(F('subtotal') - (F('quantity') * F('product__cost_price')))
-    )['total'] or 0
-    
-    # Get profit trend data for last 7 days - only delivered orders
-    now = timezone.now()
-    profit_trend_data = []
-    profit_trend_labels = []
-    
-    for i in range(6, -1, -1):  # Last 7 days
-        day = now - timedelta(days=i)
-        day_start = day.replace(hour=0, minute=0, second=0, microsecond=0)
-        day_end = day_start + timedelta(days=1)
-        
-        day_profit = OrderItem.objects.filter(
-            order__created_at__gte=day_start,
-            order__created_at__lt=day_end,
-            order__status='delivered'
-        ).aggregate(
-            total=Sum(F('subtotal') - (F('quantity') * F('product__cost_price')))
-        )['total'] or 0
-        
-        profit_trend_data.append(float(day_profit))
-        profit_trend_labels.append(day.strftime('%d/%m'))
-    
+def dashboard_summary(request):
+    """
+    Data for every admin dashboard widget in one response - only delivered
+    orders, read from the daily sales rollup. ``?from=&to=`` (YYYY-MM-DD)
+    select the days of the trend charts (default: the last 7 days).
+    """
+    today = timezone.localdate()
+    start, end, error = _parse_range(request, today)
+    if error:
+        return JsonResponse({'detail': error}, status=400)
+
+    totals = defaultdict(float)
+    months = defaultdict(float)
+    categories = defaultdict(int)
+    by_day = defaultdict(lambda: defaultdict(float))
+    first_month = (end.replace(day=1) - timedelta(days=365)).replace(day=1)
+    for row in _sales_totals(today, start, end):
+        for name in ('total_units', 'total_revenue', 'total_profit', 'units_today', 'units_week', 'units_month',
+                     'revenue_month', 'profit_month'):
+            totals[name] += float(row[name] or 0)
+        if row['in_range']:
+            for name in ('total_units', 'total_revenue', 'total_profit'):
+                by_day[row['bucket']][name] += float(row[name] or 0)
+        # Monthly profit chart: the 12 months up to the end of the range
+        month = row['bucket'].replace(day=1)
+        if first_month < month <= end:
+            months[month] += float((row['total_revenue'] or 0) - (row['total_cost'] or 0))
+        if row['category__name'] and row['total_units']:
+            categories[row['category__name']] += row['total_units']
+
+    days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    daily = [by_day.get(day, {}) for day in days]
+    category_items = sorted(categories.items(), key=lambda item: -item[1])
+
     return JsonResponse({
-        'total_profit': float(total_profit),
-        'recent_profit': float(recent_profit),
-        'currency': 'AZN',
-        'trend_chart': {
-            'labels': profit_trend_labels,
-            'data': profit_trend_data
-        }
+        'range': {
+            'from': start.isoformat(),
+            'to': end.isoformat(),
+            'units': sum(row.get('total_units', 0) for row in daily),
+            'revenue': sum(float(row.get('total_revenue', 0)) for row in daily),
+            'profit': sum(float(row.get('total_profit', 0)) for row in daily),
+        },
+        'revenue': {
+            'total_revenue': totals['total_revenue'],
+            'recent_revenue': totals['revenue_month'],
+            'currency': 'AZN',
+            'trend_chart': {
+                'labels': [day.strftime('%d/%m') for day in days],
+                'data': [float(row.get('total_revenue', 0)) for row in daily]
+            }
+        },
+        'profit': {
+            'total_profit': totals['total_profit'],
+            'recent_profit': totals['profit_month'],
+            'currency': 'AZN',
+            'trend_chart': {
+                'labels': [day.strftime('%d/%m') for day in days],
+                'data': [float(row.get('total_profit', 0)) for row in daily]
+            }
+        },
+        'sales_units': {
+            'daily': int(totals['units_today']),
+            'weekly': int(totals['units_week']),
+            'monthly': int(totals['units_month']),
+            'daily_chart': {
+                'labels': [day.strftime('%m/%d') for day in days],
+                'datasets': [{
+                    'label': 'Satış',
+                    'data': [int(row.get('total_units', 0)) for row in daily],
+                    'backgroundColor': 'rgba(16, 185, 129, 0.5)',
+                    'borderColor': 'rgb(16, 185, 129)',
+                    'borderWidth': 1
+                }]
+            }
+        },
+        'monthly_profit': {
+            'labels': [month.strftime('%Y-%m') for month in sorted(months)],
+            'datasets': [{
+                'label': 'Mənfəət',
+                'data': [months[month] for month in sorted(months)],
+                'backgroundColor': 'rgba(59, 130, 246, 0.5)',
+                'borderColor': 'rgb(59, 130, 246)',
+                'borderWidth': 1
+            }]
+        },
+        'category_distribution': {
+            'labels': [name for name, _ in category_items],
+            'datasets': [{
+                'data': [units for _, units in category_items],
+                'backgroundColor': CATEGORY_COLORS
+            }]
+        },
+        'recent_orders': {
+            'orders': _recent_orders()
+        },
+        # Rolling averages, order value percentiles, week over week and category mix up to ``to``
+        'analytics': sales_report(end),
+        'stockout_risks': {
+            'threshold_days': settings.STOCK_LOW_COVER_DAYS,
+            'products': _stockout_risks(),
+        },
     })
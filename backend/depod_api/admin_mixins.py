@@ -1,4 +1,7 @@
-from django.db import models
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections, models
+from django.utils.functional import cached_property
 try:
     # Unfold WYSIWYG widget
     from unfold.contrib.forms.widgets import WysiwygWidget
@@ -21,3 +24,40 @@ class RichTextTabularInlineMixin:
     formfield_overrides = (
         {models.TextField: {"widget": WysiwygWidget}} if WysiwygWidget else {}
     )
+
+
+def estimated_count(queryset):
+    """
+    Row count the PostgreSQL planner expects for ``queryset`` (``EXPLAIN``,
+    no table scan), or None on other databases.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator for large changelists: above ADMIN_ESTIMATED_COUNT_THRESHOLD
+    rows the planner's estimate is used instead of an exact COUNT(*).
+    """
+
+    @cached_property
+    def count(self):
+        estimate = estimated_count(self.object_list)
+        if estimate is not None and estimate > settings.ADMIN_ESTIMATED_COUNT_THRESHOLD:
+            return estimate
+        return super().count
+
+
+class LargeTableAdminMixin:
+    """Changelist without exact counts of the filtered and the whole table."""
+
+    paginator = EstimatedCountPaginator
+    # Skip the extra unfiltered COUNT(*) behind "N results (M total)"
+    show_full_result_count = False
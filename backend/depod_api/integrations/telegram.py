@@ -1,39 +1,304 @@
+"""
+Telegram notifications.
+
+Messages go through one TelegramNotifier per process. Its sender thread owns a
+keep-alive connection to the Bot API and sends at most TELEGRAM_MAX_PER_MINUTE
+messages a minute (and one a second, Telegram's per-chat limit). Events that
+arrive while it waits for the rate window, or for the ``retry_after`` of a 429
+response, are coalesced into digest messages instead of being dropped.
+``notify()`` only buffers the event and returns, so a burst of any size is
+merged into digests whatever the worker concurrency. Messages that fail for
+another reason, or are still buffered when the process exits, are queued as
+``orders.send_telegram_message`` jobs, which send them directly and are
+retried and dead-lettered like any other job.
+
+Point TELEGRAM_API_URL at ``manage.py telegram_stub`` to run this offline.
+"""
+import atexit
+import http.client
 import json
+import logging
 import os
 import threading
-import urllib.request
+import time
 import urllib.parse
+from collections import deque
 from typing import Optional
 
+logger = logging.getLogger(__name__)
 
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")  # user, group, or channel id
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL", "https://api.telegram.org")
+TELEGRAM_MAX_PER_MINUTE = int(os.getenv("TELEGRAM_MAX_PER_MINUTE", "20"))  # Telegram's limit for groups
 ADMIN_BASE_URL = os.getenv("ADMIN_BASE_URL", "http://127.0.0.1:8000")
 
+MESSAGE_LIMIT = 4096  # characters per Telegram message
+DIGEST_SEPARATOR = "\n\n— — —\n\n"
+
+
+class TelegramError(Exception):
+    def __init__(self, description, retry_after=None):
+        super().__init__(description)
+        self.retry_after = retry_after
+
+
+class TelegramClient:
+    """Bot API client over one persistent HTTP(S) connection; use from one thread."""
+
+    def __init__(self, token, api_url=TELEGRAM_API_URL, timeout=6):
+        parts = urllib.parse.urlsplit(api_url)
+        self.connection_class = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+        self.host = parts.hostname
+        self.port = parts.port
+        self.prefix = parts.path.rstrip("/")
+        self.token = token
+        self.timeout = timeout
+        self.connection = None
+        self.connects = 0
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def call(self, method, params):
+        body = urllib.parse.urlencode(params).encode()
+        headers = {"Content-Type": "application/x-www-form-urlencoded"}
+        path = f"{self.prefix}/bot{self.token}/{method}"
+        while True:
+            reused = self.connection is not None
+            if not reused:
+                self.connection = self.connection_class(self.host, self.port, timeout=self.timeout)
+                self.connects += 1
+            try:
+                self.connection.request("POST", path, body=body, headers=headers)
+                response = self.connection.getresponse()
+                raw = response.read()
+                break
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                self.close()
+                if not reused:
+                    raise
+                # The server dropped the idle keep-alive connection; retry once on a fresh one
+            except Exception:
+                self.close()
+                raise
+        if response.will_close:
+            self.close()
+        try:
+            data = json.loads(raw)
+        except ValueError:
+            raise TelegramError(f"HTTP {response.status} from Telegram")
+        if not data.get("ok"):
+            retry_after = (data.get("parameters") or {}).get("retry_after")
+            raise TelegramError(data.get("description") or f"HTTP {response.status}", retry_after)
+        return data.get("result")
+
+
+class TelegramNotifier:
+    """Rate-aware, coalescing sender for one chat (see the module docstring)."""
+
+    def __init__(self, token, chat_id, api_url=TELEGRAM_API_URL, max_messages=TELEGRAM_MAX_PER_MINUTE,
+                 window=60.0, min_interval=1.0, on_failure=None):
+        self.client = TelegramClient(token, api_url)
+        self.chat_id = chat_id
+        self.max_messages = max_messages
+        self.window = window
+        self.min_interval = min_interval
+        # Called with the texts of messages that could not be sent
+        self.on_failure = on_failure
+        self.pending = deque()  # event texts waiting for the sender
+        self.sending = 0  # events taken by the sender and not finished yet
+        self.condition = threading.Condition()
+        self.sent_at = deque()  # send times inside the current window (sender thread only)
+        self.blocked_until = 0.0
+        self.thread = None
+        self.stats = {"events": 0, "messages": 0, "digests": 0, "rate_limited": 0, "failed": 0}
+
+    def notify(self, text):
+        """Buffer ``text`` for the sender thread and return; it goes out alone or in a digest."""
+        with self.condition:
+            self.pending.append(text)
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name="telegram-notifier", daemon=True)
+                self.thread.start()
+            self.condition.notify_all()
+
+    def flush(self, timeout=None):
+        """Wait until every buffered event was sent or handed to ``on_failure``; False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.condition:
+            while self.pending or self.sending:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self.condition.wait(remaining)
+        return True
+
+    def close(self, timeout=10):
+        """Flush; events still waiting afterwards (e.g. rate limited) are handed to ``on_failure``."""
+        if self.flush(timeout):
+            return
+        with self.condition:
+            left = list(self.pending)
+            self.pending.clear()
+        if left:
+            self._failed([text for text, _ in self._compose(left)], TelegramError("Notifier closed before sending"))
+
+    def _delay(self):
+        """Seconds until the next message may be sent."""
+        now = time.monotonic()
+        while self.sent_at and now - self.sent_at[0] >= self.window:
+            self.sent_at.popleft()
+        waits = [self.blocked_until - now]
+        if self.sent_at:
+            waits.append(self.sent_at[-1] + self.min_interval - now)
+            if len(self.sent_at) >= self.max_messages:
+                waits.append(self.sent_at[0] + self.window - now)
+        return max(waits)
+
+    def _wait_for_slot(self):
+        delay = self._delay()
+        while delay > 0:
+            time.sleep(delay)
+            delay = self._delay()
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while not self.pending:
+                    self.condition.wait()
+            # Events keep queueing up while we wait; they all go out together
+            self._wait_for_slot()
+            with self.condition:
+                batch = list(self.pending)
+                self.pending.clear()
+                self.sending = len(batch)
+            try:
+                if batch:
+                    self._send_batch(batch)
+            except Exception as e:  # keep the sender alive for later events
+                logger.error(f"Telegram sender failed: {e}")
+            finally:
+                with self.condition:
+                    self.sending = 0
+                    self.condition.notify_all()
+
+    def _compose(self, texts):
+        """Split event ``texts`` into ``(message, texts)`` pairs within Telegram's size limit."""
+        if len(texts) == 1:
+            return [(texts[0], texts)]
+        chunks = []
+        current = []
+        size = 0
+        for text in texts:
+            extra = len(text) + len(DIGEST_SEPARATOR)
+            if current and size + extra > MESSAGE_LIMIT - 100:
+                chunks.append(current)
+                current, size = [], 0
+            current.append(text)
+            size += extra
+        chunks.append(current)
+        messages = []
+        for chunk in chunks:
+            if len(chunk) == 1:
+                messages.append((chunk[0], chunk))
+            else:
+                header = f"<b>Toplu bildiriş: {len(chunk)} mesaj</b>"
+                messages.append((DIGEST_SEPARATOR.join([header] + chunk), chunk))
+        return messages
+
+    def _send_batch(self, texts):
+        messages = self._compose(texts)
+        for index, (text, chunk) in enumerate(messages):
+            if index:
+                self._wait_for_slot()
+            try:
+                self.client.call("sendMessage", {
+                    "chat_id": self.chat_id,
+                    "text": text,
+                    "parse_mode": "HTML",
+                    "disable_web_page_preview": True,
+                })
+            except TelegramError as e:
+                if e.retry_after is None:
+                    self._failed([message for message, _ in messages[index:]], e)
+                    return
+                # Rate limited: back off and put the rest back in front of the queue to be coalesced
+                self.stats["rate_limited"] += 1
+                self.blocked_until = time.monotonic() + float(e.retry_after)
+                logger.warning(f"Telegram rate limit hit; retrying in {e.retry_after}s")
+                with self.condition:
+                    self.pending.extendleft(reversed([t for _, c in messages[index:] for t in c]))
+                return
+            except Exception as e:
+                self._failed([message for message, _ in messages[index:]], e)
+                return
+            self.sent_at.append(time.monotonic())
+            self.stats["messages"] += 1
+            self.stats["digests"] += len(chunk) > 1
+            self.stats["events"] += len(chunk)
+
+    def _failed(self, messages, error):
+        self.stats["failed"] += len(messages)
+        logger.error(f"Telegram send failed for {len(messages)} message(s): {error}")
+        if self.on_failure is not None:
+            try:
+                self.on_failure(messages)
+            except Exception as e:
+                logger.error(f"Could not hand over {len(messages)} unsent Telegram message(s): {e}")
+
+
+def send_message(text):
+    """Send one message right away on a connection of its own; errors propagate."""
+    client = TelegramClient(TELEGRAM_BOT_TOKEN)
+    try:
+        client.call("sendMessage", {
+            "chat_id": TELEGRAM_CHAT_ID,
+            "text": text,
+            "parse_mode": "HTML",
+            "disable_web_page_preview": True,
+        })
+    finally:
+        client.close()
+
+
+def _requeue(messages):
+    """Queue unsent messages as jobs, which send them directly and are retried with backoff."""
+    from django.db import connection
+    from jobs.queue import enqueue
+    try:
+        for text in messages:
+            enqueue("orders.send_telegram_message", text=text)
+    finally:
+        # Runs on the sender thread, which has a database connection of its own
+        if threading.current_thread() is not threading.main_thread():
+            connection.close()
+
+
+_notifier = None
+_notifier_lock = threading.Lock()
+
+
+def get_notifier():
+    global _notifier
+    with _notifier_lock:
+        if _notifier is None:
+            _notifier = TelegramNotifier(TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID, on_failure=_requeue)
+            # Send (or queue as jobs) what is still buffered when the process exits
+            atexit.register(_notifier.close)
+    return _notifier
+
 
 def _post_telegram(text: str) -> None:
     if not TELEGRAM_BOT_TOKEN or not TELEGRAM_CHAT_ID:
         return  # Not configured; do nothing
-    url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
-    payload = {
-        "chat_id": TELEGRAM_CHAT_ID,
-        "text": text,
-        "parse_mode": "HTML",
-        "disable_web_page_preview": True,
-    }
-    data = urllib.parse.urlencode(payload).encode()
-    req = urllib.request.Request(url, data=data, method="POST")
-    req.add_header("Content-Type", "application/x-www-form-urlencoded")
-    try:
-        with urllib.request.urlopen(req, timeout=6) as resp:  # nosec - external API by config
-            resp.read()  # best-effort, ignore content
-    except Exception:
-        # Best-effort: ignore network errors to not block order creation
-        pass
+    get_notifier().notify(text)
 
 
 def notify_new_order(order, request: Optional[object] = None) -> None:
-    """Fire-and-forget Telegram message for a newly created order."""
+    """Telegram message for a newly created order (run from the orders.notify_new_order job)."""
     try:
         user_email = getattr(order.user, "email", str(order.user_id))
     except Exception:
@@ -41,7 +306,7 @@ def notify_new_order(order, request: Optional[object] = None) -> None:
 
     admin_link = f"{ADMIN_BASE_URL}/admin/orders/order/{order.id}/change/"
 
-    # A brief summary line; items may be added after order create in some flows
+    # A brief summary line
     lines = [
         f"<b>Yeni sifariş</b>  #<b>{order.id}</b>",
         f"İstifadəçi: {user_email}",
@@ -66,14 +331,13 @@ def notify_new_order(order, request: Optional[object] = None) -> None:
 
     lines.append(f"Admin: {admin_link}")
 
-    # Try to include first item if available
+    # Include the ordered items if available
     try:
-        first_item = order.items.all().first()
-        if first_item:
-            lines.append(f"Məhsul: {first_item.name} × {first_item.quantity}")
+        for item in order.items.all():
+            lines.append(f"Məhsul: {item.name} × {item.quantity}")
     except Exception:
         pass
 
     text = "\n".join(lines)
 
-    threading.Thread(target=_post_telegram, args=(text,), daemon=True).start()
+    _post_telegram(text)
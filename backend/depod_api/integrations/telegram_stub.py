@@ -0,0 +1,100 @@
+"""
+Local stand-in for the Telegram Bot API, to exercise the notifier offline.
+
+It answers ``sendMessage`` over HTTP/1.1 keep-alive, enforces a per-chat limit
+like Telegram does (429 with ``parameters.retry_after``) and records accepted
+messages, rejected requests and opened connections. See ``manage.py
+telegram_stub``.
+"""
+import json
+import math
+import threading
+import time
+import urllib.parse
+from collections import defaultdict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        with self.server.stub.lock:
+            self.server.stub.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        params = urllib.parse.parse_qs(self.rfile.read(length).decode())
+        if not self.path.endswith("/sendMessage"):
+            self._reply(404, {"ok": False, "error_code": 404, "description": "Not Found"})
+            return
+        chat_id = (params.get("chat_id") or [""])[0]
+        text = (params.get("text") or [""])[0]
+        status, payload = self.server.stub.send_message(chat_id, text)
+        self._reply(status, payload)
+
+
+class TelegramStub:
+    """Threaded stub server; ``limit`` messages per ``window`` seconds and chat."""
+
+    def __init__(self, host="127.0.0.1", port=0, limit=20, window=60.0):
+        self.limit = limit
+        self.window = window
+        self.lock = threading.Lock()
+        self.messages = []
+        self.rejected = 0
+        self.connections = 0
+        self._sent = defaultdict(deque)
+        self.server = ThreadingHTTPServer((host, port), _Handler)
+        self.server.daemon_threads = True
+        self.server.stub = self
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def send_message(self, chat_id, text):
+        now = time.monotonic()
+        with self.lock:
+            sent = self._sent[chat_id]
+            while sent and now - sent[0] >= self.window:
+                sent.popleft()
+            if len(sent) >= self.limit:
+                self.rejected += 1
+                retry_after = max(1, math.ceil(sent[0] + self.window - now))
+                return 429, {
+                    "ok": False,
+                    "error_code": 429,
+                    "description": f"Too Many Requests: retry after {retry_after}",
+                    "parameters": {"retry_after": retry_after},
+                }
+            sent.append(now)
+            self.messages.append({"chat_id": chat_id, "text": text})
+            message_id = len(self.messages)
+        return 200, {"ok": True, "result": {"message_id": message_id, "chat": {"id": chat_id}, "text": text}}
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, name="telegram-stub", daemon=True)
+        self.thread.start()
+        return self
+
+    def serve_forever(self):
+        self.server.serve_forever()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,42 @@
+from rest_framework.pagination import PageNumberPagination, CursorPagination
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor pagination over the queryset's own ordering (e.g. ``-id`` for
+    products, ``-created_at`` for orders and reviews). Pages are fetched with
+    ``WHERE <key> < <cursor>`` instead of OFFSET and no COUNT(*) is issued,
+    so deep pages cost the same as the first one.
+    """
+
+    def get_ordering(self, request, queryset, view):
+        ordering = queryset.query.order_by or queryset.model._meta.ordering
+        return tuple(ordering) if ordering else ('-pk',)
+
+
+class DepodPagination(PageNumberPagination):
+    """
+    Page-number pagination by default; switches to keyset pagination when the
+    request carries ``?pagination=cursor`` or a ``cursor`` from a previous
+    keyset page, so existing ``?page=`` clients keep working unchanged.
+    """
+    mode_query_param = 'pagination'
+    cursor_class = KeysetPagination
+
+    def use_cursor(self, request):
+        return (
+            request.query_params.get(self.mode_query_param) == 'cursor'
+            or self.cursor_class.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        if self.use_cursor(request):
+            self.cursor_paginator = self.cursor_class()
+            return self.cursor_paginator.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
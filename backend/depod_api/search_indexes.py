@@ -0,0 +1,39 @@
+"""
+Trigram indexes for admin search.
+
+Admin ``search_fields`` are matched with ``icontains``, which PostgreSQL runs
+as ``UPPER("col"::text) LIKE UPPER('%term%')``. A btree index cannot serve a
+leading wildcard, so every search scanned the whole table; a GIN index on the
+same expression with ``gin_trgm_ops`` (pg_trgm) can. Indexes are built
+``CONCURRENTLY``, so migrations using them must set ``atomic = False``. On
+other databases (SQLite in development) the operation does nothing.
+"""
+from django.db import migrations
+
+
+def trigram_index_name(table, column):
+    return f'{table}_{column}_trgm'[:63]
+
+
+def trigram_indexes(table, columns):
+    """Migration operation creating a trigram index per column of ``table``."""
+
+    def forwards(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        qn = schema_editor.quote_name
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for column in columns:
+            schema_editor.execute(
+                f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {qn(trigram_index_name(table, column))} '
+                f'ON {qn(table)} USING gin ((UPPER({qn(column)}::text)) gin_trgm_ops)'
+            )
+
+    def backwards(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        qn = schema_editor.quote_name
+        for column in columns:
+            schema_editor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {qn(trigram_index_name(table, column))}')
+
+    return migrations.RunPython(forwards, backwards)
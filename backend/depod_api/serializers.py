@@ -0,0 +1,30 @@
+def sparse_fieldset(request):
+    """
+    Parse ``?fields=a,b`` (keep only these) and ``?omit=c,d`` (drop these).
+    Returns ``(keep, omit)``; ``keep`` is None when no restriction was asked for.
+    """
+    def parse(name):
+        raw = request.query_params.get(name) if request is not None else None
+        return {f.strip() for f in raw.split(',') if f.strip()} if raw else None
+
+    return parse('fields'), parse('omit') or set()
+
+
+def selected_fields(field_names, request):
+    """The subset of ``field_names`` a request's sparse fieldset selects, in order."""
+    keep, omit = sparse_fieldset(request)
+    return [f for f in field_names if (keep is None or f in keep) and f not in omit]
+
+
+class SparseFieldsetMixin:
+    """Lets API clients trim a serializer's representation with ?fields= / ?omit=."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None:
+            return
+        allowed = set(selected_fields(list(self.fields), request))
+        for name in list(self.fields):
+            if name not in allowed:
+                self.fields.pop(name)
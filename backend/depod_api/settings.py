@@ -42,6 +42,7 @@ INSTALLED_APPS = [
     'cms',
     'reviews',
     'payments',
+    'jobs',
 ]
 
 MIDDLEWARE = [
@@ -141,13 +142,56 @@ MEDIA_ROOT = BASE_DIR / 'media'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Cache. Use a shared backend (memcached/redis) in production so that catalog
+# invalidation performed by one worker is seen by all of them.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'depod-default'),
+    }
+}
+# Version stamps and everything cached under them (catalog responses, ETags, price tables,
+# analytics reports) are only used when the cache is shared by all workers; with a process-local
+# backend they are bypassed. Set CACHE_IS_SHARED=1 for a single-process deployment on LocMemCache.
+CACHE_IS_SHARED = os.getenv('CACHE_IS_SHARED', '0' if CACHES['default']['BACKEND'] in (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+) else '1') == '1'
+# Seconds a cached catalog response may live; entries are also invalidated on any catalog write
+CATALOG_CACHE_TIMEOUT = int(os.getenv('CATALOG_CACHE_TIMEOUT', '3600'))
+# Seconds a sales analytics report is kept (reports are also keyed by the sales rollup version)
+ANALYTICS_CACHE_TIMEOUT = int(os.getenv('ANALYTICS_CACHE_TIMEOUT', str(24 * 3600)))
+# Seconds a stored Idempotency-Key response is replayed (order/payment creation)
+IDEMPOTENCY_KEY_TTL = int(os.getenv('IDEMPOTENCY_KEY_TTL', str(24 * 3600)))
+# Seconds a request holds its Idempotency-Key before a retry may take it over (a worker that died
+# mid-request); keep it above the web worker timeout so a slow request is not run twice
+IDEMPOTENCY_LOCK_TIMEOUT = int(os.getenv('IDEMPOTENCY_LOCK_TIMEOUT', '60'))
+
+# Background jobs (manage.py run_worker): retries back off from JOB_BACKOFF_BASE seconds,
+# doubling per attempt up to JOB_BACKOFF_MAX; jobs still failing after JOB_MAX_ATTEMPTS are dead-lettered
+JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', '8'))
+JOB_BACKOFF_BASE = int(os.getenv('JOB_BACKOFF_BASE', '10'))
+JOB_BACKOFF_MAX = int(os.getenv('JOB_BACKOFF_MAX', '3600'))
+# A running job whose worker has not finished it after this many seconds is claimed again
+JOB_LOCK_TIMEOUT = int(os.getenv('JOB_LOCK_TIMEOUT', '600'))
+JOB_RETENTION_DAYS = int(os.getenv('JOB_RETENTION_DAYS', '7'))
+# Stock-out forecasting (orders.forecast_stock job): velocity over the last STOCK_FORECAST_DAYS days,
+# weighted with a STOCK_FORECAST_HALF_LIFE day half-life, recomputed every STOCK_FORECAST_INTERVAL seconds
+STOCK_FORECAST_DAYS = int(os.getenv('STOCK_FORECAST_DAYS', '28'))
+STOCK_FORECAST_HALF_LIFE = float(os.getenv('STOCK_FORECAST_HALF_LIFE', '7'))
+STOCK_FORECAST_INTERVAL = int(os.getenv('STOCK_FORECAST_INTERVAL', str(6 * 3600)))
+# Products with fewer days of cover are listed in the dashboard's stock-out widget
+STOCK_LOW_COVER_DAYS = int(os.getenv('STOCK_LOW_COVER_DAYS', '14'))
+# Admin changelists above this many rows (planner estimate, PostgreSQL only) show the estimate instead of COUNT(*)
+ADMIN_ESTIMATED_COUNT_THRESHOLD = int(os.getenv('ADMIN_ESTIMATED_COUNT_THRESHOLD', '10000'))
+
 # DRF
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
     # API uses only JWT authentication; admin panel still uses Django sessions (not DRF)
     'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'depod_api.pagination.DepodPagination',
     'PAGE_SIZE': 12,
     'DEFAULT_RENDERER_CLASSES': (
         'rest_framework.renderers.JSONRenderer',
@@ -186,6 +230,7 @@ SERVER_EMAIL = os.getenv('SERVER_EMAIL', 'system@depod.az')
 EMAIL_TIMEOUT = int(os.getenv('EMAIL_TIMEOUT', '10'))  # Reduce timeout to 10 seconds
 EMAIL_USE_LOCALTIME = False  # Use UTC for email timestamps
 EMAIL_CONNECTION_MAX_AGE = 300  # Keep connection alive for 5 minutes
+EMAIL_BATCH_SIZE = int(os.getenv('EMAIL_BATCH_SIZE', '100'))  # Orders per bulk email job (one SMTP connection each)
 
 # If no SMTP host is provided and in DEBUG, default to console backend for safety
 if DEBUG and not EMAIL_HOST:
@@ -217,7 +262,7 @@ CORS_ALLOW_CREDENTIALS = True
 CORS_ALLOWED_ORIGINS = [
     o.strip() for o in os.getenv('CORS_ALLOWED_ORIGINS', 'http://127.0.0.1:5500,http://localhost:5500,http://127.0.0.1:8000').split(',') if o.strip()
 ]
-CORS_ALLOW_HEADERS = list(os.getenv('CORS_ALLOW_HEADERS', 'authorization,content-type,accept,x-requested-with,x-csrftoken').split(','))
+CORS_ALLOW_HEADERS = list(os.getenv('CORS_ALLOW_HEADERS', 'authorization,content-type,accept,x-requested-with,x-csrftoken,idempotency-key').split(','))
 
 # CSRF trusted origins (must include scheme)
 CSRF_TRUSTED_ORIGINS = [
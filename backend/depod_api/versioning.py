@@ -0,0 +1,99 @@
+import functools
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+
+def cache_is_shared():
+    """
+    Whether version stamps can be relied on. A stamp bumped in a process-local
+    cache (LocMemCache) is invisible to the other workers, which would keep
+    serving what they cached under the old stamp; callers skip their caches
+    and validators when this is False (settings.CACHE_IS_SHARED).
+    """
+    return settings.CACHE_IS_SHARED
+
+
+def _now_ms():
+    return int(time.time() * 1000)
+
+
+def _version_key(namespace):
+    return f'version:{namespace}'
+
+
+def get_version(namespace):
+    """
+    Current version stamp of ``namespace``. Stamps are millisecond timestamps
+    of the last write, so they double as Last-Modified values, and a stamp
+    lost to cache eviction is re-seeded with a value greater than any stamp
+    used before.
+    """
+    key = _version_key(namespace)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _now_ms(), None)
+        version = cache.get(key) or _now_ms()
+    return version
+
+
+def get_versions(namespaces):
+    keys = {_version_key(ns): ns for ns in namespaces}
+    found = cache.get_many(keys.keys())
+    return {ns: found[key] if key in found else get_version(ns) for key, ns in keys.items()}
+
+
+def bump_version(namespace, on_bump=None):
+    """
+    Advance the stamp of ``namespace`` once the current transaction commits.
+    ``on_bump(version)`` is then called with the new stamp, e.g. to store a
+    value precomputed for that version.
+    """
+    def _bump():
+        key = _version_key(namespace)
+        current = cache.get(key) or 0
+        version = max(_now_ms(), current + 1)
+        cache.set(key, version, None)
+        if on_bump is not None:
+            on_bump(version)
+    transaction.on_commit(_bump)
+
+
+def conditional_response(request, namespaces, render):
+    """
+    Conditional GET for read endpoints whose content only changes when one of
+    ``namespaces`` is bumped. Returns 304 without calling ``render()`` when the
+    client's If-None-Match / If-Modified-Since validators are still current.
+    Without a shared cache every request is rendered and no validators are sent.
+    """
+    if not cache_is_shared():
+        return render()
+    versions = get_versions(namespaces)
+    seed = '|'.join([request.build_absolute_uri()] + [f'{ns}={versions[ns]}' for ns in sorted(versions)])
+    etag = '"%s"' % hashlib.sha1(seed.encode('utf-8')).hexdigest()
+    last_modified = max(versions.values()) // 1000
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = render()
+    if response.status_code in (200, 304):
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        # Let browsers keep the body but revalidate it on every use
+        patch_cache_control(response, no_cache=True)
+    return response
+
+
+def conditional_get(*namespaces):
+    """Decorator applying :func:`conditional_response` to a view method."""
+    def decorator(view_method):
+        @functools.wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            return conditional_response(request, namespaces, lambda: view_method(self, request, *args, **kwargs))
+        return wrapper
+    return decorator
@@ -0,0 +1,26 @@
+from django.contrib import admin, messages
+from django.utils import timezone
+from unfold.admin import ModelAdmin
+from depod_api.admin_mixins import LargeTableAdminMixin
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(LargeTableAdminMixin, ModelAdmin):
+    list_display = ('id', 'name', 'status', 'attempts', 'max_attempts', 'run_at', 'created_at', 'finished_at')
+    list_filter = ('status', 'name')
+    search_fields = ('name', 'last_error')
+    readonly_fields = ('name', 'payload', 'status', 'attempts', 'max_attempts', 'run_at', 'locked_at',
+                       'locked_by', 'last_error', 'created_at', 'finished_at')
+    actions = ['requeue_jobs']
+
+    def has_add_permission(self, request):
+        return False
+
+    def requeue_jobs(self, request, queryset):
+        """Run dead (or finished) jobs again with a fresh attempt budget."""
+        count = queryset.exclude(status='running').update(
+            status='queued', attempts=0, run_at=timezone.now(), locked_at=None, locked_by='', finished_at=None,
+        )
+        self.message_user(request, f'{count} tapşırıq yenidən növbəyə qoyuldu.', messages.SUCCESS)
+    requeue_jobs.short_description = "Seçilən tapşırıqları yenidən növbəyə qoy"
@@ -0,0 +1,27 @@
+import signal
+
+from django.core.management.base import BaseCommand
+
+from jobs.worker import Worker
+
+
+class Command(BaseCommand):
+    help = 'Run background jobs (emails, Telegram notifications, ...) from the job table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=4, help='Jobs run in parallel threads (default 4)')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds between polls when idle')
+        parser.add_argument('--once', action='store_true', help='Exit once no job is due (e.g. from cron)')
+
+    def handle(self, *args, **options):
+        worker = Worker(concurrency=options['concurrency'], poll_interval=options['poll_interval'])
+
+        # Finish running jobs, claim no new ones
+        def shutdown(signum, frame):
+            self.stdout.write('Stopping worker...')
+            worker.stop()
+        signal.signal(signal.SIGTERM, shutdown)
+        signal.signal(signal.SIGINT, shutdown)
+
+        self.stdout.write(self.style.SUCCESS(f'Worker {worker.name} running with concurrency {worker.concurrency}'))
+        worker.run(once=options['once'])
@@ -0,0 +1,18 @@
+# Trigram indexes for the admin search_fields (PostgreSQL only, see depod_api.search_indexes)
+
+from django.db import migrations
+
+from depod_api.search_indexes import trigram_indexes
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('jobs', '0001_initial'),
+    ]
+
+    operations = [
+        trigram_indexes('jobs_job', ['name', 'last_error']),
+    ]
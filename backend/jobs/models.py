@@ -0,0 +1,34 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """A unit of background work, run by ``manage.py run_worker`` (see jobs.worker)."""
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('dead', 'Dead'),  # gave up after max_attempts; requeue from the admin
+    ]
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=8)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    locked_by = models.CharField(max_length=100, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-id']
+        indexes = [
+            # Claim query: due queued jobs (and stale running ones) by run_at
+            models.Index(fields=['status', 'run_at'], name='jobs_job_status_run_at'),
+            models.Index(fields=['locked_by'], name='jobs_job_locked_by'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.id} — {self.status}"
@@ -0,0 +1,40 @@
+"""
+Task registry and enqueueing.
+
+Tasks are plain functions registered under a name with ``@task``; they take
+JSON-serializable keyword arguments (pass ids, not model instances).
+``enqueue`` inserts the job row in the caller's transaction, so a worker can
+only see it once that transaction commits, and a rolled back request leaves
+no job behind.
+"""
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Job
+
+TASKS = {}
+
+
+def task(name, max_attempts=None):
+    """Register the decorated function as task ``name``."""
+    def decorator(func):
+        if name in TASKS:
+            raise ValueError(f'Task {name!r} is already registered')
+        func.task_name = name
+        func.max_attempts = max_attempts
+        TASKS[name] = func
+        return func
+    return decorator
+
+
+def enqueue(name, run_at=None, **payload):
+    """Queue task ``name`` with keyword arguments ``payload``; returns the Job."""
+    func = TASKS.get(name)
+    if func is None:
+        raise KeyError(f'Unknown task {name!r}')
+    return Job.objects.create(
+        name=name,
+        payload=payload,
+        run_at=run_at or timezone.now(),
+        max_attempts=func.max_attempts or settings.JOB_MAX_ATTEMPTS,
+    )
@@ -0,0 +1,99 @@
+from datetime import timedelta
+
+from django.test import TransactionTestCase, override_settings
+from django.utils import timezone
+
+from .models import Job
+from .queue import enqueue, task
+from .worker import Worker, backoff_delay
+
+calls = []
+
+
+@task('jobs.tests.record', max_attempts=3)
+def record(value):
+    calls.append(value)
+
+
+@task('jobs.tests.fail', max_attempts=3)
+def fail():
+    raise RuntimeError('boom')
+
+
+@override_settings(JOB_BACKOFF_BASE=10, JOB_BACKOFF_MAX=3600, JOB_LOCK_TIMEOUT=600)
+class WorkerTests(TransactionTestCase):
+    def setUp(self):
+        calls.clear()
+        self.worker = Worker(name='test')
+
+    def run_due(self):
+        jobs = self.worker.claim(10)
+        for job in jobs:
+            self.worker.execute(job)
+        return jobs
+
+    def make_due(self, job):
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now() - timedelta(seconds=1))
+
+    def test_successful_job_is_done(self):
+        job = enqueue('jobs.tests.record', value=1)
+        self.assertEqual(len(self.run_due()), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('done', 1))
+        self.assertEqual(calls, [1])
+
+    def test_failing_job_is_retried_with_backoff_then_dead_lettered(self):
+        job = enqueue('jobs.tests.fail')
+        self.assertEqual(job.max_attempts, 3)
+
+        for attempt in (1, 2):
+            before = timezone.now()
+            self.assertEqual(len(self.run_due()), 1)
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.attempts, job.locked_by), ('queued', attempt, ''))
+            self.assertIn('RuntimeError: boom', job.last_error)
+            base = 10 * 2 ** (attempt - 1)
+            self.assertGreaterEqual(job.run_at, before + timedelta(seconds=base))
+            self.assertLessEqual(job.run_at, timezone.now() + timedelta(seconds=base * 1.25))
+            # Not due until the backoff has passed
+            self.assertEqual(self.run_due(), [])
+            self.make_due(job)
+
+        self.run_due()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('dead', 3))
+        self.assertIsNotNone(job.finished_at)
+        self.make_due(job)
+        self.assertEqual(self.run_due(), [])
+
+    def test_unknown_task_is_dead_lettered_at_once(self):
+        job = Job.objects.create(name='jobs.tests.missing', payload={})
+        self.run_due()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('dead', 1))
+
+    def test_job_is_claimed_once(self):
+        job = enqueue('jobs.tests.record', value=1)
+        self.assertEqual([claimed.pk for claimed in self.worker.claim(10)], [job.pk])
+        self.assertEqual(Worker(name='other').claim(10), [])
+
+    def test_stale_running_job_is_reclaimed_and_old_result_ignored(self):
+        job = enqueue('jobs.tests.record', value=1)
+        [stale] = self.worker.claim(10)
+        Job.objects.filter(pk=job.pk).update(locked_at=timezone.now() - timedelta(seconds=601))
+
+        [reclaimed] = Worker(name='other').claim(10)
+        self.assertEqual(reclaimed.attempts, 2)
+        # The first worker finishes late: its token no longer matches
+        self.worker.execute(stale)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.locked_by), ('running', reclaimed.locked_by))
+
+        Worker(name='other').execute(reclaimed)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'done')
+
+    def test_backoff_is_capped(self):
+        for _ in range(20):
+            self.assertLessEqual(backoff_delay(30), 3600 * 1.25)
+            self.assertGreaterEqual(backoff_delay(1), 10)
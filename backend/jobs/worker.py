@@ -0,0 +1,148 @@
+"""
+Job worker.
+
+Jobs are claimed in batches with ``SELECT ... FOR UPDATE SKIP LOCKED``
+(one conditional UPDATE on SQLite), so any number of worker processes can
+share the table without handing the same job out twice. Each claim marks its rows with a unique ``locked_by`` token;
+results are only written back while the token still matches. Jobs left
+``running`` by a worker that died are claimed again after
+``JOB_LOCK_TIMEOUT`` seconds.
+
+Failures are retried with exponential backoff (``JOB_BACKOFF_BASE`` doubling
+per attempt, capped at ``JOB_BACKOFF_MAX``, plus jitter). After
+``max_attempts`` the job is dead-lettered: it stays in the table with status
+``dead`` and its last traceback until requeued from the admin.
+"""
+import logging
+import os
+import random
+import socket
+import threading
+import traceback
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Job
+from .queue import TASKS
+
+logger = logging.getLogger(__name__)
+
+
+def backoff_delay(attempts):
+    """Seconds to wait before retrying a job that has failed ``attempts`` times."""
+    delay = min(settings.JOB_BACKOFF_MAX, settings.JOB_BACKOFF_BASE * 2 ** max(attempts - 1, 0))
+    return delay + random.uniform(0, delay / 4)
+
+
+class Worker:
+    def __init__(self, concurrency=1, poll_interval=1.0, name=None):
+        self.concurrency = max(1, concurrency)
+        self.poll_interval = poll_interval
+        self.name = name or f'{socket.gethostname()}:{os.getpid()}'
+        self.stopping = threading.Event()
+        self._last_purge = None
+
+    def stop(self):
+        self.stopping.set()
+
+    def claim(self, limit):
+        """Claim up to ``limit`` due jobs and return them (status ``running``)."""
+        now = timezone.now()
+        claimable = Q(status='queued', run_at__lte=now) | Q(
+            status='running', locked_at__lt=now - timedelta(seconds=settings.JOB_LOCK_TIMEOUT)
+        )
+        token = f'{self.name}:{uuid.uuid4().hex[:12]}'
+        due = Job.objects.filter(claimable).order_by('run_at', 'id')
+        claim = dict(status='running', locked_at=now, locked_by=token, attempts=F('attempts') + 1)
+        if connection.features.has_select_for_update_skip_locked:
+            with transaction.atomic():
+                ids = list(due.select_for_update(skip_locked=True).values_list('pk', flat=True)[:limit])
+                if not ids:
+                    return []
+                Job.objects.filter(pk__in=ids).update(**claim)
+        else:
+            # SQLite: no row locks, but a single UPDATE ... WHERE id IN (SELECT ... LIMIT n) is atomic
+            if not Job.objects.filter(pk__in=due.values('pk')[:limit]).update(**claim):
+                return []
+        return list(Job.objects.filter(locked_by=token, status='running'))
+
+    def execute(self, job):
+        close_old_connections()
+        try:
+            func = TASKS.get(job.name)
+            if func is None:
+                self._fail(job, f'Unknown task {job.name!r}', dead=True)
+                return
+            try:
+                func(**job.payload)
+            except Exception:
+                self._fail(job, traceback.format_exc())
+                return
+            Job.objects.filter(pk=job.pk, locked_by=job.locked_by).update(
+                status='done', finished_at=timezone.now(), last_error='',
+            )
+            logger.info(f"Job {job.name} #{job.id} done (attempt {job.attempts})")
+        finally:
+            close_old_connections()
+
+    def _fail(self, job, error, dead=False):
+        current = Job.objects.filter(pk=job.pk, locked_by=job.locked_by)
+        if dead or job.attempts >= job.max_attempts:
+            current.update(status='dead', finished_at=timezone.now(), last_error=error)
+            logger.error(f"Job {job.name} #{job.id} dead after {job.attempts} attempts: {error.strip().splitlines()[-1]}")
+            return
+        delay = backoff_delay(job.attempts)
+        current.update(
+            status='queued', run_at=timezone.now() + timedelta(seconds=delay),
+            locked_at=None, locked_by='', last_error=error,
+        )
+        logger.warning(f"Job {job.name} #{job.id} failed (attempt {job.attempts}), retrying in {delay:.0f}s")
+
+    def purge_finished(self):
+        """Delete done jobs older than JOB_RETENTION_DAYS (at most once an hour)."""
+        now = timezone.now()
+        if self._last_purge and now - self._last_purge < timedelta(hours=1):
+            return
+        self._last_purge = now
+        cutoff = now - timedelta(days=settings.JOB_RETENTION_DAYS)
+        Job.objects.filter(status='done', finished_at__lt=cutoff).delete()
+
+    def run(self, once=False):
+        """
+        Process jobs until stop() is called; with ``once``, exit when no job
+        is due and none is running.
+        """
+        logger.info(f"Worker {self.name} started (concurrency {self.concurrency})")
+        running = set()
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='job') as executor:
+            while not self.stopping.is_set():
+                self.purge_finished()
+                running = {f for f in running if not f.done()}
+                free = self.concurrency - len(running)
+                try:
+                    jobs = self.claim(free) if free else []
+                except Exception as e:
+                    # e.g. lost database connection; try again after a pause
+                    logger.error(f"Worker {self.name} could not claim jobs: {e}")
+                    close_old_connections()
+                    self.stopping.wait(self.poll_interval)
+                    continue
+                for job in jobs:
+                    running.add(executor.submit(self.execute, job))
+                if jobs:
+                    continue
+                if once and not running:
+                    break
+                if running:
+                    wait(running, timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+                else:
+                    self.stopping.wait(self.poll_interval)
+            # Leaving the executor waits for jobs already started
+        close_old_connections()
+        logger.info(f"Worker {self.name} stopped")
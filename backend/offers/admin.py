@@ -1,11 +1,11 @@
 from django.contrib import admin
 from unfold.admin import ModelAdmin
-from depod_api.admin_mixins import RichTextAdminMixin
+from depod_api.admin_mixins import LargeTableAdminMixin, RichTextAdminMixin
 from .models import Offer
 
 
 @admin.register(Offer)
-class OfferAdmin(RichTextAdminMixin, ModelAdmin):
+class OfferAdmin(LargeTableAdminMixin, RichTextAdminMixin, ModelAdmin):
     list_display = (
         "id",
         "user",
@@ -19,3 +19,4 @@ class OfferAdmin(RichTextAdminMixin, ModelAdmin):
     )
     list_filter = ("status", "created_at")
     search_fields = ("first_name", "last_name", "phone_number", "email")
+    list_select_related = ("user", "product")
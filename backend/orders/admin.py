@@ -2,10 +2,13 @@ from django.contrib import admin
 from django.utils.html import format_html
 from django.urls import reverse
 from django.contrib import messages
+from django.db import transaction
+from django.conf import settings
 from unfold.admin import ModelAdmin, TabularInline
-from depod_api.admin_mixins import RichTextAdminMixin, RichTextTabularInlineMixin
+from depod_api.admin_mixins import LargeTableAdminMixin, RichTextAdminMixin, RichTextTabularInlineMixin
+from jobs.queue import enqueue
 from .models import Order, OrderItem
-from .email_utils import send_order_confirmation_email, send_order_delivered_email
+from .utils import restore_orders_stock
 
 
 class OrderItemInline(RichTextTabularInlineMixin, TabularInline):
@@ -15,56 +18,67 @@ class OrderItemInline(RichTextTabularInlineMixin, TabularInline):
 
 
 @admin.register(Order)
-class OrderAdmin(RichTextAdminMixin, ModelAdmin):
+class OrderAdmin(LargeTableAdminMixin, RichTextAdminMixin, ModelAdmin):
     list_display = ("id", "user_link", "status", "status_display", "total_price", "student_discount_info", "created_at", "estimated_delivery")
     list_filter = ("status", "created_at")
     search_fields = ("user__email", "user__first_name", "user__last_name", "id")
     list_editable = ("status",)
     inlines = [OrderItemInline]
     readonly_fields = ('pricing_snapshot', 'discount_details')
-    actions = ['send_confirmation_email', 'send_delivery_email']
+    actions = ['send_confirmation_email', 'send_delivery_email', 'cancel_orders']
     
+    def _enqueue_emails(self, request, queryset, kind, label):
+        """Queue bulk email jobs (EMAIL_BATCH_SIZE orders each) and link to their progress."""
+        order_ids = list(queryset.filter(user__email__gt='').order_by('pk').values_list('pk', flat=True))
+        if not order_ids:
+            self.message_user(request, 'Seçilən sifarişlərdə e-poçt ünvanı yoxdur.', messages.WARNING)
+            return
+        batch_size = settings.EMAIL_BATCH_SIZE
+        with transaction.atomic():
+            jobs = [
+                enqueue('orders.send_order_emails', kind=kind, order_ids=order_ids[i:i + batch_size])
+                for i in range(0, len(order_ids), batch_size)
+            ]
+        url = reverse('admin:jobs_job_changelist') + '?id__in=' + ','.join(str(job.pk) for job in jobs)
+        self.message_user(
+            request,
+            format_html(
+                '{} sifariş üçün {} maili növbəyə əlavə edildi ({} tapşırıq). <a href="{}">Gedişatı izlə</a>',
+                len(order_ids), label, len(jobs), url,
+            ),
+            messages.SUCCESS
+        )
+
     def send_confirmation_email(self, request, queryset):
-        """Send order confirmation emails for selected orders."""
-        success_count = 0
-        for order in queryset:
-            if send_order_confirmation_email(order):
-                success_count += 1
-            
-        if success_count == queryset.count():
-            self.message_user(
-                request,
-                f'Təsdiq maili {success_count} sifariş üçün uğurla göndərildi.',
-                messages.SUCCESS
-            )
-        else:
-            self.message_user(
-                request,
-                f'{success_count}/{queryset.count()} təsdiq maili göndərildi.',
-                messages.WARNING
-            )
+        """Queue order confirmation emails for selected orders."""
+        self._enqueue_emails(request, queryset, 'confirmation', 'təsdiq')
     send_confirmation_email.short_description = "Seçilən sifarişlər üçün təsdiq maili göndər"
     
     def send_delivery_email(self, request, queryset):
-        """Send delivery confirmation emails for selected orders."""
-        success_count = 0
-        for order in queryset:
-            if send_order_delivered_email(order):
-                success_count += 1
-            
-        if success_count == queryset.count():
+        """Queue delivery confirmation emails for selected orders."""
+        self._enqueue_emails(request, queryset, 'delivered', 'çatdırılma')
+    send_delivery_email.short_description = "Seçilən sifarişlər üçün çatdırılma maili göndər"
+    
+    def cancel_orders(self, request, queryset):
+        """Cancel selected orders and return their items to stock in one batch."""
+        with transaction.atomic():
+            # Lock the orders so a concurrent cancel cannot restore the same stock twice
+            order_ids = list(
+                queryset.select_for_update().exclude(status__in=('cancelled', 'delivered')).values_list('pk', flat=True)
+            )
+            if order_ids:
+                orders = Order.objects.filter(pk__in=order_ids)
+                restore_orders_stock(orders)
+                orders.update(status='cancelled')
+        if order_ids:
             self.message_user(
                 request,
-                f'Çatdırılma maili {success_count} sifariş üçün uğurla göndərildi.',
+                f'{len(order_ids)} sifariş ləğv edildi, məhsullar stoka qaytarıldı.',
                 messages.SUCCESS
             )
         else:
-            self.message_user(
-                request,
-                f'{success_count}/{queryset.count()} çatdırılma maili göndərildi.',
-                messages.WARNING
-            )
-    send_delivery_email.short_description = "Seçilən sifarişlər üçün çatdırılma maili göndər"
+            self.message_user(request, 'Ləğv ediləcək sifariş tapılmadı.', messages.WARNING)
+    cancel_orders.short_description = "Seçilən sifarişləri ləğv et (stoku bərpa et)"
     
     def user_link(self, obj):
         """Create a clickable link to the user admin page."""
@@ -124,13 +138,19 @@ class OrderAdmin(RichTextAdminMixin, ModelAdmin):
             info.append(f"Tələbə endirimi: {details['student_discount']}%")
         if details['user_student_status']:
             info.append(f"İstifadəçi statusu: {details['user_student_status']}")
+        if len(details['items']) > 1:
+            for item in details['items']:
+                line = f"Məhsul #{item.get('product_id')}: {item.get('final_unit_price')} AZN × {item.get('quantity')}"
+                if item.get('student_discount_applied'):
+                    line += f" (tələbə endirimi {item['student_discount_applied']}%)"
+                info.append(line)
             
         return format_html('<br>'.join(info)) if info else "Məlumat yoxdur"
     discount_details.short_description = 'Endirim Təfərrüatları'
 
 
 @admin.register(OrderItem)
-class OrderItemAdmin(RichTextAdminMixin, ModelAdmin):
+class OrderItemAdmin(LargeTableAdminMixin, RichTextAdminMixin, ModelAdmin):
     list_display = ("id", "order_link", "product_link", "quantity", "unit_price", "subtotal")
     search_fields = ("order__id", "product__name", "name")
     list_filter = ("order__status", "order__created_at")
@@ -0,0 +1,194 @@
+"""
+Sales analytics over delivered orders.
+
+Order item facts are read with one ``values_list`` scan into NumPy arrays
+(int32 day index, float64 amounts, int16 category codes) and every series is
+computed with vectorized operations: rolling averages, order value
+percentiles, week-over-week deltas and the category mix shift. With a shared
+cache, reports are cached under the sales rollup version, so they are only
+rebuilt after delivered sales change.
+"""
+from datetime import date, datetime, time, timedelta
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import FloatField
+from django.db.models.functions import Cast, TruncDate
+from django.utils import timezone
+
+from catalog.models import Category
+from depod_api.versioning import cache_is_shared, get_version
+from .models import OrderItem
+from .rollups import ROLLUP_NAMESPACE
+
+REPORT_DAYS = 365
+CHART_DAYS = 28
+ROLLING_WINDOWS = (7, 28)
+PERCENTILES = (25, 50, 75, 90, 95, 99)
+
+
+class SalesFacts:
+    """Delivered order items of ``start..start + days - 1`` as parallel arrays."""
+
+    def __init__(self, start, days, day, order, category, units, revenue, cost, category_ids):
+        self.start = start
+        self.days = days
+        self.day = day                # int32 days since start
+        self.order = order            # int32 order codes 0..n_orders-1
+        self.category = category      # int16 category codes into category_ids
+        self.units = units            # float64
+        self.revenue = revenue        # float64
+        self.cost = cost              # float64, NaN where no unit cost was recorded
+        self.category_ids = category_ids
+        # Profit only counts items with a known cost, like the rollup
+        self.profit = np.where(np.isnan(cost), 0.0, revenue - np.nan_to_num(cost))
+        self.n_orders = int(order.max()) + 1 if len(order) else 0
+        self.order_day = np.zeros(self.n_orders, dtype=np.int32)
+        self.order_day[order] = day
+        self.order_value = np.bincount(order, weights=revenue, minlength=self.n_orders)
+
+    def daily(self, values):
+        return np.bincount(self.day, weights=values, minlength=self.days)
+
+    def daily_orders(self):
+        return np.bincount(self.order_day, minlength=self.days).astype(np.float64)
+
+
+def load_facts(end, days=REPORT_DAYS):
+    start = end - timedelta(days=days - 1)
+    # Bounds as datetimes so the (status, created_at) index can be used
+    since = timezone.make_aware(datetime.combine(start, time.min))
+    until = timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min))
+    rows = list(
+        OrderItem.objects
+        .filter(order__status='delivered', order__created_at__gte=since, order__created_at__lt=until)
+        .annotate(
+            day=TruncDate('order__created_at'),
+            revenue=Cast('subtotal', FloatField()),
+            cost=Cast('unit_cost', FloatField()),
+        )
+        .values_list('day', 'order_id', 'category_id', 'quantity', 'revenue', 'cost')
+        .order_by()
+    )
+    if not rows:
+        empty = np.zeros(0, dtype=np.float64)
+        return SalesFacts(start, days, np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int32),
+                          np.zeros(0, dtype=np.int16), empty, empty, empty, [])
+    day_col, order_col, category_col, units_col, revenue_col, cost_col = zip(*rows)
+    day = np.fromiter(map(date.toordinal, day_col), dtype=np.int32, count=len(rows)) - start.toordinal()
+    category_ids, category = np.unique(np.array(category_col, dtype=np.int64), return_inverse=True)
+    _, order = np.unique(np.array(order_col, dtype=np.int64), return_inverse=True)
+    return SalesFacts(
+        start, days, day,
+        order.astype(np.int32),
+        category.astype(np.int16),
+        np.array(units_col, dtype=np.float64),
+        np.array(revenue_col, dtype=np.float64),
+        # cost is None for items sold without a unit cost -> NaN
+        np.array(cost_col, dtype=np.float64),
+        category_ids.tolist(),
+    )
+
+
+def rolling_mean(values, window):
+    """Trailing ``window``-day mean for every day (partial windows at the start)."""
+    sums = np.cumsum(np.concatenate(([0.0], values)))
+    counts = np.minimum(np.arange(1, len(values) + 1), window)
+    return (sums[1:] - sums[np.maximum(np.arange(1, len(values) + 1) - window, 0)]) / counts
+
+
+def _round(values):
+    return [round(float(v), 2) for v in values]
+
+
+def _delta(current, previous):
+    return {
+        'current': round(float(current), 2),
+        'previous': round(float(previous), 2),
+        'change': round(float(current - previous), 2),
+        'change_pct': round(float((current - previous) / previous * 100), 1) if previous else None,
+    }
+
+
+def _order_value_stats(values):
+    if not len(values):
+        return {'count': 0, 'mean': 0.0, **{f'p{p}': 0.0 for p in PERCENTILES}}
+    return {
+        'count': int(len(values)),
+        'mean': round(float(values.mean()), 2),
+        **{f'p{p}': round(float(v), 2) for p, v in zip(PERCENTILES, np.percentile(values, PERCENTILES))},
+    }
+
+
+def build_report(facts):
+    days = facts.days
+    revenue = facts.daily(facts.revenue)
+    profit = facts.daily(facts.profit)
+    units = facts.daily(facts.units)
+    orders = facts.daily_orders()
+    chart_days = [facts.start + timedelta(days=i) for i in range(days - CHART_DAYS, days)]
+
+    # Week over week: the last 7 days against the 7 before
+    week = slice(days - 7, days)
+    prev_week = slice(days - 14, days - 7)
+    week_over_week = {
+        name: _delta(series[week].sum(), series[prev_week].sum())
+        for name, series in (('revenue', revenue), ('profit', profit), ('units', units), ('orders', orders))
+    }
+
+    # Order values (one value per order, dated by the order)
+    recent_orders = facts.order_day >= days - CHART_DAYS
+    order_value = {
+        'last_28_days': _order_value_stats(facts.order_value[recent_orders]),
+        'last_365_days': _order_value_stats(facts.order_value),
+    }
+
+    # Category revenue share: last 28 days against the 28 before
+    n_categories = len(facts.category_ids)
+    current = facts.day >= days - CHART_DAYS
+    previous = (facts.day >= days - 2 * CHART_DAYS) & ~current
+    current_revenue = np.bincount(facts.category[current], weights=facts.revenue[current], minlength=n_categories)
+    previous_revenue = np.bincount(facts.category[previous], weights=facts.revenue[previous], minlength=n_categories)
+    current_share = current_revenue / current_revenue.sum() * 100 if current_revenue.sum() else np.zeros(n_categories)
+    previous_share = previous_revenue / previous_revenue.sum() * 100 if previous_revenue.sum() else np.zeros(n_categories)
+    names = Category.objects.in_bulk(facts.category_ids) if n_categories else {}
+    category_mix = sorted(
+        (
+            {
+                'category': names[category_id].name if category_id in names else str(category_id),
+                'revenue': round(float(current_revenue[code]), 2),
+                'share': round(float(current_share[code]), 1),
+                'previous_share': round(float(previous_share[code]), 1),
+                'shift': round(float(current_share[code] - previous_share[code]), 1),
+            }
+            for code, category_id in enumerate(facts.category_ids)
+        ),
+        key=lambda row: -row['revenue'],
+    )
+
+    return {
+        'labels': [day.strftime('%d/%m') for day in chart_days],
+        'revenue': _round(revenue[-CHART_DAYS:]),
+        'rolling': {
+            f'revenue_{window}d': _round(rolling_mean(revenue, window)[-CHART_DAYS:]) for window in ROLLING_WINDOWS
+        } | {
+            f'profit_{window}d': _round(rolling_mean(profit, window)[-CHART_DAYS:]) for window in ROLLING_WINDOWS
+        },
+        'week_over_week': week_over_week,
+        'order_value': order_value,
+        'category_mix': category_mix,
+    }
+
+
+def sales_report(end=None):
+    """Analytics report for the year up to ``end`` (today), cached per sales rollup version."""
+    end = end or timezone.localdate()
+    if not cache_is_shared():
+        return build_report(load_facts(end))
+    key = f'analytics:sales:{get_version(ROLLUP_NAMESPACE)}:{end.isoformat()}'
+    report = cache.get(key)
+    if report is None:
+        report = build_report(load_facts(end))
+        cache.set(key, report, settings.ANALYTICS_CACHE_TIMEOUT)
+    return report
@@ -1,5 +1,5 @@
-from django.core.mail import EmailMultiAlternatives
-from django.template.loader import render_to_string
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.template.loader import get_template
 from django.conf import settings
 from django.utils import timezone
 import logging
@@ -13,6 +13,8 @@ logger = logging.getLogger(__name__)
 def _send_email_with_retry(email_instance, max_retries=3, delay=1):
     """
     Helper function to send email with retry logic and better error handling
+    (used by the test_email_delivery command; order emails go through
+    send_order_emails and are retried by the job worker)
     """
     for attempt in range(max_retries):
         try:
@@ -37,29 +39,8 @@ def _send_email_with_retry(email_instance, max_retries=3, delay=1):
     return False
 
 
-def send_order_confirmation_email(order):
-    """
-    Send professional order confirmation email with anti-spam measures and retry logic
-    """
-    try:
-        if not order.user.email:
-            logger.warning(f"No email address for user {order.user.id}")
-            return False
-            
-        # Professional subject line (avoid spam keywords)
-        subject = f"Depod.az - Sifariş #{order.id} Təsdiqləndi"
-        
-        # Render HTML content
-        html_content = render_to_string('emails/order_confirmation.html', {
-            'order': order,
-            'user': order.user,
-            'site_name': 'Depod.az',
-            'support_email': 'info@depod.az',
-            'current_year': timezone.now().year,
-        })
-        
-        # Create plain text version
-        text_content = f"""
+def _confirmation_text(order):
+    text_content = f"""
 Hörmətli {order.user.first_name or order.user.email},
 
 Sifarişiniz uğurla qəbul edildi!
@@ -72,11 +53,11 @@ Sifariş məlumatları:
 
 Məhsullar:
 """
-        
-        for item in order.items.all():
-            text_content += f"- {item.name} × {item.quantity} = {item.subtotal} AZN\n"
-        
-        text_content += f"""
+    
+    for item in order.items.all():
+        text_content += f"- {item.name} × {item.quantity} = {item.subtotal} AZN\n"
+    
+    text_content += f"""
 Təxmini çatdırılma tarixi: {order.estimated_delivery.strftime('%d %B %Y')}
 
 Sifarişiniz barədə yenilik olduqda sizə məlumat veriləcək.
@@ -86,84 +67,11 @@ Sifarişiniz barədə yenilik olduqda sizə məlumat veriləcək.
 Təşəkkürlər,
 DEPOD.AZ
 """
-        
-        # Check if email backend is console (development)
-        if hasattr(settings, 'EMAIL_BACKEND') and 'console' in settings.EMAIL_BACKEND.lower():
-            logger.info(f"Console email backend detected. Order confirmation email content for #{order.id}:")
-            logger.info(f"To: {order.user.email}")
-            logger.info(f"Subject: {subject}")
-            logger.info(f"HTML length: {len(html_content)} characters")
-            return True
-        
-        # Send email only if email backend is properly configured
-        if hasattr(settings, 'EMAIL_HOST') and settings.EMAIL_HOST:
-            # Professional from address - fix format issue
-            default_email = getattr(settings, 'DEFAULT_FROM_EMAIL', 'orders@depod.az')
-            if '<' in default_email and '>' in default_email:
-                from_email = default_email
-            else:
-                from_email = f"Depod Orders <{default_email}>"
-            
-            # Create email with anti-spam headers
-            email = EmailMultiAlternatives(
-                subject=subject,
-                body=text_content,
-                from_email=from_email,
-                to=[order.user.email],
-                headers={
-                    'Reply-To': 'info@depod.az',
-                    'X-Mailer': 'Depod E-commerce System',
-                    'X-Priority': '3',  # Normal priority
-                    'X-MSMail-Priority': 'Normal',
-                    'Importance': 'Normal',
-                    'List-Unsubscribe': f'<mailto:unsubscribe@depod.az?subject=Unsubscribe_{order.user.id}>',
-                    'Message-ID': f'<order_{order.id}_{timezone.now().timestamp()}@depod.az>',
-                }
-            )
-            email.attach_alternative(html_content, "text/html")
-            
-            # Send email with retry logic
-            success = _send_email_with_retry(email, max_retries=3, delay=2)
-            
-            if success:
-                logger.info(f"Order confirmation email sent to {order.user.email} for order #{order.id}")
-                return True
-            else:
-                logger.error(f"Failed to send order confirmation email for order #{order.id} after 3 retries")
-                return False
-        else:
-            logger.info(f"Email not configured. Would send order confirmation to {order.user.email} for order #{order.id}")
-            return True
-            
-    except Exception as e:
-        logger.error(f"Failed to send order confirmation email for order #{order.id}: {str(e)}")
-        # Don't let email errors break order creation
-        return False
+    return text_content
 
 
-def send_order_delivered_email(order):
-    """
-    Send professional delivery confirmation email with anti-spam measures
-    """
-    try:
-        if not order.user.email:
-            logger.warning(f"No email address for user {order.user.id}")
-            return False
-            
-        # Professional subject line (avoid spam keywords)
-        subject = f"Depod.az - Sifariş #{order.id} Təslim Edildi"
-        
-        # Render HTML content
-        html_content = render_to_string('emails/order_delivered.html', {
-            'order': order,
-            'user': order.user,
-            'site_name': 'Depod.az',
-            'support_email': 'info@depod.az',
-            'current_year': timezone.now().year,
-        })
-        
-        # Create plain text version
-        text_content = f"""
+def _delivered_text(order):
+    text_content = f"""
 Hörmətli {order.user.first_name or order.user.email},
 
 Sifarişiniz uğurla çatdırıldı! 🎉
@@ -175,11 +83,11 @@ Sifariş məlumatları:
 
 Çatdırılan məhsullar:
 """
-        
-        for item in order.items.all():
-            text_content += f"- {item.name} × {item.quantity}\n"
-        
-        text_content += f"""
+    
+    for item in order.items.all():
+        text_content += f"- {item.name} × {item.quantity}\n"
+    
+    text_content += f"""
 DEPOD.AZ-dan alış-veriş etdiyiniz üçün təşəkkür edirik!
 
 Məhsullarımızdan razı qaldınız? Rəyinizi bildirərək digər müştərilərə kömək edin.
@@ -191,56 +99,173 @@ Məhsullarımızdan razı qaldınız? Rəyinizi bildirərək digər müştəril
 Təşəkkürlər,
 DEPOD.AZ
 """
-        
-        # Check if email backend is console (development)
-        if hasattr(settings, 'EMAIL_BACKEND') and 'console' in settings.EMAIL_BACKEND.lower():
-            logger.info(f"Console email backend detected. Delivery confirmation email content for #{order.id}:")
-            logger.info(f"To: {order.user.email}")
-            logger.info(f"Subject: {subject}")
-            logger.info(f"HTML length: {len(html_content)} characters")
-            return True
-        
-        # Send email only if email backend is properly configured
-        if hasattr(settings, 'EMAIL_HOST') and settings.EMAIL_HOST:
-            # Professional from address - fix format issue
-            default_email = getattr(settings, 'DEFAULT_FROM_EMAIL', 'orders@depod.az')
-            if '<' in default_email and '>' in default_email:
-                from_email = default_email
-            else:
-                from_email = f"Depod Delivery <{default_email}>"
-            
-            # Create email with anti-spam headers
-            email = EmailMultiAlternatives(
-                subject=subject,
-                body=text_content,
-                from_email=from_email,
-                to=[order.user.email],
-                headers={
-                    'Reply-To': 'info@depod.az',
-                    'X-Mailer': 'Depod E-commerce System',
-                    'X-Priority': '3',  # Normal priority
-                    'X-MSMail-Priority': 'Normal',
-                    'Importance': 'Normal',
-                    'List-Unsubscribe': f'<mailto:unsubscribe@depod.az?subject=Unsubscribe_{order.user.id}>',
-                    'Message-ID': f'<delivery_{order.id}_{timezone.now().timestamp()}@depod.az>',
-                }
-            )
-            email.attach_alternative(html_content, "text/html")
-            
-            # Send email with retry logic
-            success = _send_email_with_retry(email, max_retries=3, delay=2)
-            
-            if success:
-                logger.info(f"Delivery confirmation email sent to {order.user.email} for order #{order.id}")
-                return True
+    return text_content
+
+
+# kind -> how the email for one order is built
+ORDER_EMAILS = {
+    'confirmation': {
+        # Professional subject line (avoid spam keywords)
+        'subject': "Depod.az - Sifariş #{id} Təsdiqləndi",
+        'template': 'emails/order_confirmation.html',
+        'text': _confirmation_text,
+        'from_name': 'Depod Orders',
+        'message_id': 'order',
+        'label': 'order confirmation',
+    },
+    'delivered': {
+        'subject': "Depod.az - Sifariş #{id} Təslim Edildi",
+        'template': 'emails/order_delivered.html',
+        'text': _delivered_text,
+        'from_name': 'Depod Delivery',
+        'message_id': 'delivery',
+        'label': 'delivery confirmation',
+    },
+}
+
+
+def _from_email(display_name):
+    # Professional from address - fix format issue
+    default_email = getattr(settings, 'DEFAULT_FROM_EMAIL', 'orders@depod.az')
+    if '<' in default_email and '>' in default_email:
+        return default_email
+    return f"{display_name} <{default_email}>"
+
+
+def _delivery_mode():
+    """'console' in development, 'smtp' when a mail server is configured, otherwise None."""
+    if hasattr(settings, 'EMAIL_BACKEND') and 'console' in settings.EMAIL_BACKEND.lower():
+        return 'console'
+    if hasattr(settings, 'EMAIL_HOST') and settings.EMAIL_HOST:
+        return 'smtp'
+    return None
+
+
+def build_order_emails(orders, kind):
+    """
+    Render the ``kind`` email ('confirmation' or 'delivered') for many orders,
+    looking the template up once. Returns ``[(order, message)]``; orders whose
+    user has no email address are skipped. Pass orders with ``user`` selected
+    and ``items`` prefetched to avoid per-order queries.
+    """
+    spec = ORDER_EMAILS[kind]
+    template = get_template(spec['template'])
+    from_email = _from_email(spec['from_name'])
+    current_year = timezone.now().year
+    built = []
+    for order in orders:
+        if not order.user.email:
+            logger.warning(f"No email address for user {order.user.id}")
+            continue
+        html_content = template.render({
+            'order': order,
+            'user': order.user,
+            'site_name': 'Depod.az',
+            'support_email': 'info@depod.az',
+            'current_year': current_year,
+        })
+        # Create email with anti-spam headers
+        email = EmailMultiAlternatives(
+            subject=spec['subject'].format(id=order.id),
+            body=spec['text'](order),
+            from_email=from_email,
+            to=[order.user.email],
+            headers={
+                'Reply-To': 'info@depod.az',
+                'X-Mailer': 'Depod E-commerce System',
+                'X-Priority': '3',  # Normal priority
+                'X-MSMail-Priority': 'Normal',
+                'Importance': 'Normal',
+                'List-Unsubscribe': f'<mailto:unsubscribe@depod.az?subject=Unsubscribe_{order.user.id}>',
+                'Message-ID': f'<{spec["message_id"]}_{order.id}_{timezone.now().timestamp()}@depod.az>',
+            }
+        )
+        email.attach_alternative(html_content, "text/html")
+        built.append((order, email))
+    return built
+
+
+def send_email_messages(messages):
+    """
+    Send ``messages`` over one SMTP connection (opened and authenticated once).
+    Returns the indexes of the messages that could not be sent; no retries or
+    sleeps here - callers re-queue failures.
+    """
+    if not messages:
+        return []
+    connection = get_connection(fail_silently=False)
+    failed = []
+    index = 0
+    try:
+        connection.open()
+        for index, message in enumerate(messages):
+            try:
+                connection.send_messages([message])
+            except Exception as e:
+                logger.error(f"Email to {', '.join(message.to)} failed: {str(e)}")
+                failed.append(index)
+                # The connection may be unusable after an error; start a fresh one
+                connection.close()
+                connection.open()
+    except Exception as e:
+        logger.error(f"SMTP connection failed: {str(e)}")
+        failed += [i for i in range(index, len(messages)) if i not in failed]
+    finally:
+        try:
+            connection.close()
+        except Exception:
+            pass
+    return failed
+
+
+def send_order_emails(orders, kind):
+    """
+    Build and send the ``kind`` email for every order in ``orders`` over one
+    connection. Returns ``(sent_ids, failed_ids)``.
+    """
+    spec = ORDER_EMAILS[kind]
+    built = build_order_emails(orders, kind)
+    mode = _delivery_mode()
+    if mode != 'smtp':
+        for order, email in built:
+            if mode == 'console':
+                logger.info(f"Console email backend detected. {spec['label'].capitalize()} email content for #{order.id}:")
+                logger.info(f"To: {email.to[0]}")
+                logger.info(f"Subject: {email.subject}")
+                logger.info(f"HTML length: {len(email.alternatives[0][0])} characters")
             else:
-                logger.error(f"Failed to send delivery confirmation email for order #{order.id} after 3 retries")
-                return False
-        else:
-            logger.info(f"Email not configured. Would send delivery confirmation to {order.user.email} for order #{order.id}")
-            return True
-            
+                logger.info(f"Email not configured. Would send {spec['label']} to {email.to[0]} for order #{order.id}")
+        return [order.id for order, _ in built], []
+
+    failed_indexes = set(send_email_messages([email for _, email in built]))
+    sent = [order.id for i, (order, _) in enumerate(built) if i not in failed_indexes]
+    failed = [order.id for i, (order, _) in enumerate(built) if i in failed_indexes]
+    if sent:
+        logger.info(f"Sent {len(sent)} {spec['label']} emails")
+    return sent, failed
+
+
+def _send_one(order, kind):
+    if not order.user.email:
+        logger.warning(f"No email address for user {order.user.id}")
+        return False
+    try:
+        sent, failed = send_order_emails([order], kind)
     except Exception as e:
-        logger.error(f"Failed to send delivery confirmation email for order #{order.id}: {str(e)}")
-        # Don't let email errors break order status updates
+        logger.error(f"Failed to send {ORDER_EMAILS[kind]['label']} email for order #{order.id}: {str(e)}")
         return False
+    return bool(sent)
+
+
+def send_order_confirmation_email(order):
+    """
+    Send professional order confirmation email with anti-spam measures
+    """
+    return _send_one(order, 'confirmation')
+
+
+def send_order_delivered_email(order):
+    """
+    Send professional delivery confirmation email with anti-spam measures
+    """
+    return _send_one(order, 'delivered')
@@ -0,0 +1,99 @@
+"""
+Stock-out forecasting.
+
+For every product with stock tracking, the daily units sold over the last
+STOCK_FORECAST_DAYS days (orders that were not cancelled) are read in one
+scan into a products x days NumPy matrix. Sales velocity is the exponentially
+weighted daily mean (half-life STOCK_FORECAST_HALF_LIFE days); days of cover
+is stock / velocity. All forecasts are written with one upsert.
+"""
+from datetime import date, datetime, time, timedelta
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from catalog.models import Product, StockForecast
+from .models import OrderItem
+
+# Stock-outs further away than this are not dated (and would overflow date arithmetic)
+STOCKOUT_HORIZON_DAYS = 3650
+
+
+def sales_matrix(product_ids, today, days):
+    """``(len(product_ids), days)`` units sold per product and day, oldest day first."""
+    start = today - timedelta(days=days - 1)
+    since = timezone.make_aware(datetime.combine(start, time.min))
+    rows = list(
+        OrderItem.objects
+        .exclude(order__status='cancelled')
+        .filter(order__created_at__gte=since)
+        .annotate(day=TruncDate('order__created_at'))
+        .values_list('product_id', 'day', 'quantity')
+        .order_by()
+    )
+    matrix = np.zeros((len(product_ids), days), dtype=np.float64)
+    if not rows or not len(product_ids):
+        return matrix
+    product_col, day_col, quantity_col = zip(*rows)
+    products = np.array(product_col, dtype=np.int64)
+    day = np.fromiter(map(date.toordinal, day_col), dtype=np.int64, count=len(rows)) - start.toordinal()
+    quantity = np.array(quantity_col, dtype=np.float64)
+    # product_ids is sorted; keep items of tracked products inside the window
+    code = np.searchsorted(product_ids, products)
+    tracked = (code < len(product_ids)) & (product_ids[np.minimum(code, len(product_ids) - 1)] == products)
+    tracked &= (day >= 0) & (day < days)
+    flat = np.bincount(code[tracked] * days + day[tracked], weights=quantity[tracked], minlength=len(product_ids) * days)
+    return flat.reshape(len(product_ids), days)
+
+
+def velocity(matrix, half_life):
+    """Exponentially weighted units per day for each row of ``matrix``."""
+    days = matrix.shape[1]
+    weights = 0.5 ** (np.arange(days - 1, -1, -1) / half_life)
+    return matrix @ (weights / weights.sum())
+
+
+def forecast_stock(today=None):
+    """Recompute StockForecast for the whole catalog; returns the number of products forecast."""
+    today = today or timezone.localdate()
+    days = settings.STOCK_FORECAST_DAYS
+    tracked = list(Product.objects.filter(stock__isnull=False).order_by('pk').values_list('pk', 'stock'))
+    product_col, stock_col = zip(*tracked) if tracked else ((), ())
+    product_ids = np.array(product_col, dtype=np.int64)
+    stock = np.array(stock_col, dtype=np.float64)
+
+    matrix = sales_matrix(product_ids, today, days)
+    rate = velocity(matrix, settings.STOCK_FORECAST_HALF_LIFE)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cover = np.where(stock <= 0, 0.0, np.where(rate > 0, stock / rate, np.nan))
+
+    now = timezone.now()
+    forecasts = [
+        StockForecast(
+            product_id=int(pk),
+            stock=int(stock[i]),
+            units_sold=int(matrix[i].sum()),
+            daily_velocity=round(float(rate[i]), 3),
+            days_of_cover=None if np.isnan(cover[i]) else round(float(cover[i]), 1),
+            stockout_date=(
+                today + timedelta(days=int(cover[i]))
+                if cover[i] <= STOCKOUT_HORIZON_DAYS else None  # False for NaN (not selling)
+            ),
+            computed_at=now,
+        )
+        for i, pk in enumerate(product_ids)
+    ]
+    with transaction.atomic():
+        StockForecast.objects.bulk_create(
+            forecasts,
+            update_conflicts=True,
+            unique_fields=['product'],
+            update_fields=['stock', 'units_sold', 'daily_velocity', 'days_of_cover', 'stockout_date', 'computed_at'],
+            batch_size=500,
+        )
+        # Products that stopped tracking stock no longer have a forecast
+        StockForecast.objects.exclude(product_id__in=Product.objects.filter(stock__isnull=False).values('pk')).delete()
+    return len(forecasts)
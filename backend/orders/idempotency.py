@@ -0,0 +1,126 @@
+"""
+Idempotency-Key support for POST endpoints with side effects.
+
+The first request with a given key claims a row in ``IdempotencyKey`` and its
+response is stored; repeats (double clicks, client retries) get the stored
+response back without running the view again. Keys are scoped per user and
+endpoint, expire after ``settings.IDEMPOTENCY_KEY_TTL`` seconds and are
+removed by ``manage.py purge_idempotency_keys``.
+
+A claim is a lease of ``settings.IDEMPOTENCY_LOCK_TIMEOUT`` seconds: if the
+request holding it never finishes (worker killed mid-request), a retry with
+the same body takes the key over once the lease runs out instead of getting
+409 until the key expires. The lease end doubles as the claim token, so a
+request that lost its claim cannot store or release the new holder's row.
+"""
+import functools
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+
+
+def _request_hash(request):
+    data = dict(request.data.lists()) if hasattr(request.data, 'lists') else request.data
+    body = json.dumps(data, sort_keys=True, default=str)
+    return hashlib.sha256(body.encode('utf-8')).hexdigest()
+
+
+def _claim(user, scope, key, request_hash):
+    """Return ``(record, claimed)``; ``claimed`` is True when this request should run the view."""
+    now = timezone.now()
+    expires_at = now + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+    locked_until = now + timedelta(seconds=settings.IDEMPOTENCY_LOCK_TIMEOUT)
+    try:
+        with transaction.atomic():
+            record = IdempotencyKey.objects.create(
+                user=user, scope=scope, key=key, request_hash=request_hash,
+                expires_at=expires_at, locked_until=locked_until,
+            )
+        return record, True
+    except IntegrityError:
+        pass
+
+    record = IdempotencyKey.objects.filter(user=user, scope=scope, key=key).first()
+    if record is None:
+        # Released by a failed request in the meantime; let the client retry
+        return None, False
+    # Expired keys are reused; unfinished claims whose lease ran out are retried with the same body
+    stale = Q(status_code__isnull=True, request_hash=request_hash) & (
+        Q(locked_until__lte=now) | Q(locked_until__isnull=True)
+    )
+    if record.expires_at <= now or (
+        record.status_code is None and record.request_hash == request_hash
+        and (record.locked_until is None or record.locked_until <= now)
+    ):
+        # The conditional update lets only one request take it over
+        taken = IdempotencyKey.objects.filter(Q(expires_at__lte=now) | stale, pk=record.pk).update(
+            request_hash=request_hash, status_code=None, response=None,
+            expires_at=expires_at, locked_until=locked_until,
+        )
+        record.refresh_from_db()
+        return record, bool(taken)
+    return record, False
+
+
+def idempotent(scope):
+    """
+    Decorator for DRF view methods: honours the ``Idempotency-Key`` request header.
+    Responses below 500 are stored and replayed; 5xx responses and exceptions
+    release the key so the request can be retried.
+    """
+    def decorator(view_method):
+        @functools.wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            key = (request.headers.get(HEADER) or '').strip()
+            if not key:
+                return view_method(self, request, *args, **kwargs)
+            if len(key) > MAX_KEY_LENGTH:
+                return Response({'message': f'{HEADER} ən çox {MAX_KEY_LENGTH} simvol ola bilər'}, status=status.HTTP_400_BAD_REQUEST)
+
+            request_hash = _request_hash(request)
+            record, claimed = _claim(request.user, scope, key, request_hash)
+            if not claimed:
+                if record is not None and record.request_hash != request_hash:
+                    return Response(
+                        {'message': f'Bu {HEADER} başqa sorğu üçün istifadə olunub'},
+                        status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    )
+                if record is None or record.status_code is None:
+                    response = Response(
+                        {'message': f'Eyni {HEADER} ilə sorğu hələ icra olunur'},
+                        status=status.HTTP_409_CONFLICT,
+                    )
+                    if record is not None and record.locked_until is not None:
+                        wait = (record.locked_until - timezone.now()).total_seconds()
+                        response['Retry-After'] = str(max(1, int(wait) + 1))
+                    return response
+                response = Response(record.response, status=record.status_code)
+                response['Idempotent-Replayed'] = 'true'
+                return response
+
+            # Matches only while this request still holds the claim
+            held = IdempotencyKey.objects.filter(pk=record.pk, locked_until=record.locked_until)
+            try:
+                response = view_method(self, request, *args, **kwargs)
+            except Exception:
+                held.delete()
+                raise
+            if response.status_code >= 500:
+                held.delete()
+            else:
+                held.update(status_code=response.status_code, response=response.data, locked_until=None)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+
+from catalog.models import Product
+from orders.models import OrderItem
+from orders.rollups import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Fill OrderItem.unit_cost from the current product cost price for items sold before it was recorded'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--overwrite', action='store_true',
+                            help='Also replace unit costs that are already set')
+
+    def handle(self, *args, **options):
+        items = OrderItem.objects.all() if options['overwrite'] else OrderItem.objects.filter(unit_cost__isnull=True)
+        with transaction.atomic():
+            updated = items.update(
+                unit_cost=Subquery(Product.objects.filter(pk=OuterRef('product_id')).values('cost_price')[:1])
+            )
+            # Profit in the dashboard rollup comes from these costs
+            rows = rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Set unit cost on {updated} order items; rebuilt {rows} rollup rows'))
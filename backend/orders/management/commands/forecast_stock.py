@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from orders.forecasting import forecast_stock
+from orders.tasks import schedule_forecast
+
+
+class Command(BaseCommand):
+    help = 'Recompute stock-out forecasts for every product with stock tracking'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--schedule', action='store_true',
+                            help='Queue the recurring orders.forecast_stock job instead of running now')
+
+    def handle(self, *args, **options):
+        if options['schedule']:
+            schedule_forecast()
+            self.stdout.write(self.style.SUCCESS('Stock forecast job queued; run_worker will repeat it'))
+            return
+        count = forecast_stock()
+        self.stdout.write(self.style.SUCCESS(f'Forecast {count} products'))
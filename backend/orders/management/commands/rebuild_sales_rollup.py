@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from orders.rollups import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily sales rollup used by the admin dashboard from delivered orders'
+
+    def handle(self, *args, **options):
+        rows = rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt daily sales rollup: {rows} rows'))
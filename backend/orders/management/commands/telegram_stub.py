@@ -0,0 +1,64 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from depod_api.integrations.telegram import TelegramNotifier
+from depod_api.integrations.telegram_stub import TelegramStub
+
+
+class Command(BaseCommand):
+    help = 'Run a local Telegram Bot API stub, or benchmark the notifier against one (--bench)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--port', type=int, default=8081)
+        parser.add_argument('--limit', type=int, default=20, help='Messages accepted per window and chat')
+        parser.add_argument('--window', type=float, default=60.0, help='Rate limit window in seconds')
+        parser.add_argument('--bench', type=int, default=0, metavar='N',
+                            help='Send N events through a TelegramNotifier and report what arrived')
+        parser.add_argument('--threads', type=int, default=8, help='Concurrent senders for --bench')
+        parser.add_argument('--notifier-limit', type=int, default=None,
+                            help='Notifier messages per window for --bench (default: --limit)')
+
+    def handle(self, *args, **options):
+        if not options['bench']:
+            stub = TelegramStub(port=options['port'], limit=options['limit'], window=options['window'])
+            self.stdout.write(self.style.SUCCESS(
+                f'Telegram stub on {stub.url} ({options["limit"]} messages / {options["window"]:g}s per chat). '
+                f'Set TELEGRAM_API_URL={stub.url}'
+            ))
+            try:
+                stub.serve_forever()
+            except KeyboardInterrupt:
+                pass
+            self.stdout.write(f'{len(stub.messages)} messages accepted, {stub.rejected} rejected, '
+                              f'{stub.connections} connections')
+            return
+
+        stub = TelegramStub(port=0, limit=options['limit'], window=options['window']).start()
+        notifier = TelegramNotifier(
+            'test-token', '1', api_url=stub.url,
+            max_messages=options['notifier_limit'] or options['limit'],
+            window=options['window'], min_interval=0,
+        )
+        total = options['bench']
+        failures = []
+        notifier.on_failure = failures.extend
+
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=options['threads']) as executor:
+            list(executor.map(lambda i: notifier.notify(f'Event <b>#{i}</b>'), range(total)))
+        queued = time.monotonic() - started
+        notifier.flush(timeout=max(60, options['window'] * 3))
+        elapsed = time.monotonic() - started
+        stub.stop()
+
+        delivered = sum(message['text'].count('Event <b>#') for message in stub.messages)
+        self.stdout.write(
+            f'{total} events queued in {queued:.3f}s, sent in {elapsed:.2f}s: {delivered} delivered in '
+            f'{len(stub.messages)} messages ({notifier.stats["digests"]} digests), {len(failures)} failed, '
+            f'{total - delivered} missing; '
+            f'{stub.rejected} rejected with 429, {notifier.client.connects} connection(s)'
+        )
+        if delivered != total:
+            self.stdout.write(self.style.ERROR('Some events were dropped'))
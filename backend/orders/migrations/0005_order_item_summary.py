@@ -0,0 +1,56 @@
+# Generated by Django 5.0.7 on 2026-10-17 20:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_summaries(apps, schema_editor):
+    Order = apps.get_model('orders', 'Order')
+    OrderItem = apps.get_model('orders', 'OrderItem')
+    first_item = OrderItem.objects.filter(order_id=OuterRef('pk')).order_by('id')
+    Order.objects.update(
+        first_product=Subquery(first_item.values('product_id')[:1]),
+        first_item_name=Coalesce(Subquery(first_item.values('name')[:1]), Value('')),
+        first_item_image=Coalesce(Subquery(first_item.values('image')[:1]), Value('')),
+        item_count=Coalesce(
+            Subquery(
+                OrderItem.objects.filter(order_id=OuterRef('pk')).order_by()
+                .values('order_id').annotate(n=Count('id')).values('n')
+            ),
+            Value(0),
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0008_product_stock_non_negative'),
+        ('orders', '0004_remove_order_paid_at_remove_order_payment_provider_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='first_item_image',
+            field=models.URLField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='first_item_name',
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='first_product',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='catalog.product'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='item_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_summaries, migrations.RunPython.noop),
+    ]
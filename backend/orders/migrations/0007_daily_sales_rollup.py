@@ -0,0 +1,63 @@
+# Generated by Django 5.0.7 on 2026-10-17 20:52
+
+from decimal import Decimal
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import DecimalField, ExpressionWrapper, F, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate
+
+
+def build_rollup(apps, schema_editor):
+    OrderItem = apps.get_model('orders', 'OrderItem')
+    DailySalesRollup = apps.get_model('orders', 'DailySalesRollup')
+    money = DecimalField(max_digits=14, decimal_places=2)
+    zero = Value(Decimal('0.00'))
+    cost = ExpressionWrapper(F('quantity') * F('product__cost_price'), output_field=money)
+    rows = (
+        OrderItem.objects.filter(order__status='delivered')
+        .annotate(day=TruncDate('order__created_at'), category_id=F('product__category_id'))
+        .values('day', 'category_id')
+        .annotate(
+            units=Coalesce(Sum('quantity'), 0),
+            revenue=Coalesce(Sum('subtotal'), zero, output_field=money),
+            cost=Coalesce(Sum(cost), zero, output_field=money),
+            profit=Coalesce(Sum(ExpressionWrapper(F('subtotal') - cost, output_field=money)), zero, output_field=money),
+        )
+        .order_by()
+    )
+    DailySalesRollup.objects.bulk_create([
+        DailySalesRollup(
+            date=row['day'], category_id=row['category_id'],
+            units=row['units'], revenue=row['revenue'], cost=row['cost'], profit=row['profit'],
+        )
+        for row in rows
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0008_product_stock_non_negative'),
+        ('orders', '0006_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('units', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('cost', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('profit', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='catalog.category')),
+            ],
+            options={
+                'ordering': ['date'],
+                'constraints': [models.UniqueConstraint(fields=('date', 'category'), name='orders_daily_sales_rollup_unique')],
+            },
+        ),
+        migrations.RunPython(build_rollup, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.0.7 on 2026-10-17 20:54
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_unit_cost(apps, schema_editor):
+    # Existing items get the current cost price, the same cost rollup 0007 was built from
+    OrderItem = apps.get_model('orders', 'OrderItem')
+    Product = apps.get_model('catalog', 'Product')
+    OrderItem.objects.filter(unit_cost__isnull=True).update(
+        unit_cost=Subquery(Product.objects.filter(pk=OuterRef('product_id')).values('cost_price')[:1])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0007_daily_sales_rollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orderitem',
+            name='unit_cost',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True),
+        ),
+        migrations.RunPython(backfill_unit_cost, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['status', 'created_at'], name='orders_order_status_created'),
+        ),
+        migrations.AddIndex(
+            model_name='orderitem',
+            index=models.Index(fields=['order', 'product', 'quantity', 'unit_cost', 'subtotal'], name='orders_item_profit_cover'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Trigram indexes for the admin search_fields (PostgreSQL only, see depod_api.search_indexes)
+
+from django.db import migrations
+
+from depod_api.search_indexes import trigram_indexes
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('orders', '0008_orderitem_unit_cost'),
+    ]
+
+    operations = [
+        trigram_indexes('orders_orderitem', ['name']),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.0.7 on 2026-10-17 21:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_category(apps, schema_editor):
+    # Existing items get the current product category, the one the sales rollup was built from
+    OrderItem = apps.get_model('orders', 'OrderItem')
+    Product = apps.get_model('catalog', 'Product')
+    OrderItem.objects.filter(category__isnull=True).update(
+        category=Subquery(Product.objects.filter(pk=OuterRef('product_id')).values('category_id')[:1])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0010_admin_search_trigram_indexes'),
+        ('orders', '0010_idempotencykey_locked_until'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orderitem',
+            name='category',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='catalog.category'),
+        ),
+        migrations.RunPython(backfill_category, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,8 @@
 from django.db import models
 from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
 from catalog.models import Product
 
 
@@ -18,8 +21,19 @@ class Order(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     estimated_delivery = models.DateTimeField()
     pricing_snapshot = models.JSONField(null=True, blank=True)
+    # Summary of the items for order listings, maintained from OrderItem changes
+    first_product = models.ForeignKey(Product, on_delete=models.SET_NULL, null=True, blank=True, related_name='+', editable=False)
+    first_item_name = models.CharField(max_length=255, blank=True, editable=False)
+    first_item_image = models.URLField(blank=True, editable=False)
+    item_count = models.PositiveIntegerField(default=0, editable=False)
     # (payment fields removed)
 
+    class Meta:
+        indexes = [
+            # Delivered-sales scans (rollup rebuilds, reports) filter on status and order date
+            models.Index(fields=['status', 'created_at'], name='orders_order_status_created'),
+        ]
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         # Store the original status to detect changes
@@ -33,31 +47,44 @@ class Order(models.Model):
             self.status == 'delivered'
         )
         
+        # Delivered sales are rolled up for the dashboard; follow status changes in/out of 'delivered'
+        delivered_changed = bool(self.pk) and (self._original_status == 'delivered') != (self.status == 'delivered')
+        
         # Save the model first
         super().save(*args, **kwargs)
         
+        if delivered_changed:
+            from . import rollups
+            if self.status == 'delivered':
+                rollups.add_orders([self.pk])
+            else:
+                rollups.remove_orders([self.pk])
+        
         # Update the original status after saving
         self._original_status = self.status
         
-        # Trigger delivery email asynchronously if status changed to delivered
+        # Queue the delivery email if status changed to delivered (sent by the job worker)
         if status_changed_to_delivered:
-            import threading
-            from .email_utils import send_order_delivered_email
-            import logging
-            
-            logger = logging.getLogger(__name__)
-            
-            def send_delivery_email():
-                try:
-                    send_order_delivered_email(self)
-                    logger.info(f"Delivery confirmation email sent for order #{self.id}")
-                except Exception as e:
-                    logger.error(f"Failed to send delivery confirmation email for order #{self.id}: {str(e)}")
-            
-            # Start email sending in a separate thread
-            email_thread = threading.Thread(target=send_delivery_email)
-            email_thread.daemon = True
-            email_thread.start()
+            from jobs.queue import enqueue
+            enqueue('orders.send_delivered_email', order_id=self.id)
+
+    @staticmethod
+    def refresh_summaries(order_ids=None):
+        """Recompute the item summary fields for the given orders (all when None) in one UPDATE."""
+        qs = Order.objects.all() if order_ids is None else Order.objects.filter(pk__in=order_ids)
+        first_item = OrderItem.objects.filter(order_id=OuterRef('pk')).order_by('id')
+        return qs.update(
+            first_product=Subquery(first_item.values('product_id')[:1]),
+            first_item_name=Coalesce(Subquery(first_item.values('name')[:1]), Value('')),
+            first_item_image=Coalesce(Subquery(first_item.values('image')[:1]), Value('')),
+            item_count=Coalesce(
+                Subquery(
+                    OrderItem.objects.filter(order_id=OuterRef('pk')).order_by()
+                    .values('order_id').annotate(n=Count('id')).values('n')
+                ),
+                Value(0),
+            ),
+        )
 
     def refresh_from_db(self, using=None, fields=None):
         """Override to update original status when refreshing from database"""
@@ -75,15 +102,20 @@ class Order(models.Model):
         """Calculate total profit for this order (selling price - cost price)"""
         total_profit = 0
         for item in self.items.all():
-            if item.product and item.product.cost_price:
-                item_profit = (item.unit_price - item.product.cost_price) * item.quantity
+            if item.unit_cost:
+                item_profit = (item.unit_price - item.unit_cost) * item.quantity
                 total_profit += item_profit
         return total_profit
     
     def student_discount_applied(self):
         """Check if student discount was applied to this order"""
         if self.pricing_snapshot:
-            return self.pricing_snapshot.get('student_discount_applied')
+            if self.pricing_snapshot.get('student_discount_applied') is not None:
+                return self.pricing_snapshot['student_discount_applied']
+            # Cart orders record it per item
+            for item in self.pricing_snapshot.get('items') or []:
+                if item.get('student_discount_applied'):
+                    return item['student_discount_applied']
         return None
     
     def get_discount_details(self):
@@ -94,7 +126,8 @@ class Order(models.Model):
                 'final_unit_price': self.pricing_snapshot.get('final_unit_price'),
                 'product_discount': self.pricing_snapshot.get('product_discount'),
                 'student_discount': self.pricing_snapshot.get('student_discount_applied'),
-                'user_student_status': self.pricing_snapshot.get('user_student_status')
+                'user_student_status': self.pricing_snapshot.get('user_student_status'),
+                'items': self.pricing_snapshot.get('items') or [],
             }
         return None
 
@@ -107,6 +140,23 @@ class OrderItem(models.Model):
     quantity = models.PositiveIntegerField()
     unit_price = models.DecimalField(max_digits=10, decimal_places=2)
     subtotal = models.DecimalField(max_digits=10, decimal_places=2)
+    # Product cost price at the time of sale, so profit does not change when the cost is edited later
+    unit_cost = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    # Product category at the time of sale, so sales stay with that category when the product is moved
+    category = models.ForeignKey('catalog.Category', on_delete=models.PROTECT, null=True, blank=True, related_name='+')
+
+    class Meta:
+        indexes = [
+            # Covers the per-order profit aggregates without touching the item rows
+            models.Index(fields=['order', 'product', 'quantity', 'unit_cost', 'subtotal'], name='orders_item_profit_cover'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self._state.adding and self.unit_cost is None and self.product_id:
+            self.unit_cost = self.product.cost_price
+        if self._state.adding and self.category_id is None and self.product_id:
+            self.category_id = self.product.category_id
+        super().save(*args, **kwargs)
 
     def __str__(self):
         # Prefer stored name so it remains accurate even if product is renamed later
@@ -114,11 +164,58 @@ class OrderItem(models.Model):
         return f"{base} × {self.quantity}"
     
     def get_unit_profit(self):
-        """Calculate profit per unit (selling price - cost price)"""
-        if self.product and self.product.cost_price:
-            return self.unit_price - self.product.cost_price
+        """Calculate profit per unit (selling price - cost price at the time of sale)"""
+        if self.unit_cost:
+            return self.unit_price - self.unit_cost
         return 0
     
     def get_total_profit(self):
         """Calculate total profit for this item (unit profit × quantity)"""
         return self.get_unit_profit() * self.quantity
+
+
+class IdempotencyKey(models.Model):
+    """Stored response of a POST made with an Idempotency-Key header (see orders.idempotency)."""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    scope = models.CharField(max_length=64)
+    key = models.CharField(max_length=255)
+    request_hash = models.CharField(max_length=64)
+    # Empty until the first request finishes
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    # Lease of the request running the view; an unfinished claim past it is taken over by a retry
+    locked_until = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'scope', 'key'], name='orders_idempotency_key_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.scope} {self.key} — user #{self.user_id}"
+
+
+class DailySalesRollup(models.Model):
+    """
+    Delivered sales per order date and category, kept up to date by
+    orders.rollups as orders enter or leave 'delivered'. Rebuild with
+    ``manage.py rebuild_sales_rollup``.
+    """
+    date = models.DateField()
+    category = models.ForeignKey('catalog.Category', on_delete=models.CASCADE, related_name='+')
+    units = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    # Cost and profit only cover items with a recorded unit cost
+    cost = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    profit = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'category'], name='orders_daily_sales_rollup_unique'),
+        ]
+        ordering = ['date']
+
+    def __str__(self):
+        return f"{self.date} — category #{self.category_id}: {self.units} units"
@@ -0,0 +1,89 @@
+"""
+Daily sales rollup maintenance.
+
+``DailySalesRollup`` rows hold delivered sales per (order date, category),
+using the category recorded on each order item at the time of sale, so
+moving a product to another category does not shift its past sales.
+When an order enters or leaves 'delivered' its items are added to or
+subtracted from the rows of its date; edits to the items of a delivered
+order recompute that day. The dashboard only ever reads these rows.
+Every change bumps the ``orders.sales_rollup`` version stamp, which keys
+the cached analytics reports.
+"""
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import DecimalField, ExpressionWrapper, F, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate
+
+from depod_api.versioning import bump_version
+from .models import DailySalesRollup, OrderItem
+
+ROLLUP_NAMESPACE = 'orders.sales_rollup'
+
+ZERO = Value(Decimal('0.00'))
+MONEY = DecimalField(max_digits=14, decimal_places=2)
+
+
+def _aggregate(items):
+    """Group ``items`` by order date and category into rollup values."""
+    cost = ExpressionWrapper(F('quantity') * F('unit_cost'), output_field=MONEY)
+    return (
+        items.annotate(day=TruncDate('order__created_at'))
+        .values('day', 'category_id')
+        .annotate(
+            units=Coalesce(Sum('quantity'), 0),
+            revenue=Coalesce(Sum('subtotal'), ZERO, output_field=MONEY),
+            cost=Coalesce(Sum(cost), ZERO, output_field=MONEY),
+            profit=Coalesce(Sum(ExpressionWrapper(F('subtotal') - cost, output_field=MONEY)), ZERO, output_field=MONEY),
+        )
+        .order_by()
+    )
+
+
+def _apply(row, sign):
+    deltas = {name: row[name] * sign for name in ('units', 'revenue', 'cost', 'profit')}
+    current = DailySalesRollup.objects.filter(date=row['day'], category_id=row['category_id'])
+    increments = {name: F(name) + delta for name, delta in deltas.items()}
+    if current.update(**increments):
+        return
+    try:
+        with transaction.atomic():
+            DailySalesRollup.objects.create(date=row['day'], category_id=row['category_id'], **deltas)
+    except IntegrityError:
+        # Created concurrently by another order of the same day
+        current.update(**increments)
+
+
+def add_orders(order_ids):
+    """Add the items of newly delivered orders to the rollup."""
+    for row in _aggregate(OrderItem.objects.filter(order_id__in=order_ids)):
+        _apply(row, 1)
+    bump_version(ROLLUP_NAMESPACE)
+
+
+def remove_orders(order_ids):
+    """Subtract the items of orders that are no longer delivered."""
+    for row in _aggregate(OrderItem.objects.filter(order_id__in=order_ids)):
+        _apply(row, -1)
+    bump_version(ROLLUP_NAMESPACE)
+
+
+@transaction.atomic
+def rebuild(dates=None):
+    """Recompute the rows of ``dates`` (every date when None) from delivered orders."""
+    items = OrderItem.objects.filter(order__status='delivered')
+    rows = DailySalesRollup.objects.all()
+    if dates is not None:
+        items = items.filter(order__created_at__date__in=dates)
+        rows = rows.filter(date__in=dates)
+    rows.delete()
+    created = DailySalesRollup.objects.bulk_create([
+        DailySalesRollup(
+            date=row['day'], category_id=row['category_id'],
+            units=row['units'], revenue=row['revenue'], cost=row['cost'], profit=row['profit'],
+        )
+        for row in _aggregate(items)
+    ])
+    bump_version(ROLLUP_NAMESPACE)
+    return len(created)
@@ -4,7 +4,7 @@ from accounts.serializers import DeliveryAddressSerializer
 
 
 class OrderItemSerializer(serializers.ModelSerializer):
-    product_id = serializers.IntegerField(source='product.id', read_only=True)
+    product_id = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = OrderItem
@@ -21,28 +21,49 @@ class OrderSerializer(serializers.ModelSerializer):
     class Meta:
         model = Order
         fields = ['id', 'status', 'total_price', 'created_at', 'estimated_delivery', 'items', 
-                 'product_id', 'product_name', 'product_image', 'delivery_address']
+                 'product_id', 'product_name', 'product_image', 'item_count', 'delivery_address']
     
+    # First-item fields come from the summary stored on the order (no per-order queries)
     def get_product_id(self, obj):
-        # Get the first item's product_id (assuming single product orders for now)
-        first_item = obj.items.first()
-        return first_item.product.id if first_item else None
+        return obj.first_product_id
     
     def get_product_name(self, obj):
-        first_item = obj.items.first()
-        return first_item.name if first_item else None
+        return obj.first_item_name or None
     
     def get_product_image(self, obj):
-        first_item = obj.items.first()
-        return first_item.image if first_item else None
+        return obj.first_item_image or None
 
 
-class CreateOrderSerializer(serializers.Serializer):
+class CartItemSerializer(serializers.Serializer):
     product_id = serializers.IntegerField()
     quantity = serializers.IntegerField(min_value=1)
+
+
+class CreateOrderSerializer(serializers.Serializer):
+    """
+    Either a single product (product_id + quantity) or a cart (items=[{product_id, quantity}, ...]).
+    validated_data['items'] is always the cart form, with repeated products merged.
+    """
+    MAX_ITEMS = 50
+
+    product_id = serializers.IntegerField(required=False)
+    quantity = serializers.IntegerField(min_value=1, required=False)
+    items = CartItemSerializer(many=True, required=False, allow_empty=False, max_length=MAX_ITEMS)
     delivery_address_id = serializers.IntegerField()
     pricing_snapshot = serializers.JSONField(required=False)
 
+    def validate(self, attrs):
+        items = attrs.get('items')
+        if items is None:
+            if attrs.get('product_id') is None or attrs.get('quantity') is None:
+                raise serializers.ValidationError("Provide items or product_id and quantity")
+            items = [{'product_id': attrs['product_id'], 'quantity': attrs['quantity']}]
+        merged = {}
+        for item in items:
+            merged[item['product_id']] = merged.get(item['product_id'], 0) + item['quantity']
+        attrs['items'] = [{'product_id': pid, 'quantity': qty} for pid, qty in merged.items()]
+        return attrs
+
     def validate_delivery_address_id(self, value):
         user = self.context['request'].user
         try:
@@ -1,35 +1,34 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save, pre_delete
 from django.dispatch import receiver
-from .models import Order
-from depod_api.integrations.telegram import notify_new_order
-from .email_utils import send_order_confirmation_email
-import logging
-import threading
-
-logger = logging.getLogger(__name__)
+from django.utils import timezone
+from jobs.queue import enqueue
+from .models import Order, OrderItem
+from . import rollups
 
 
 @receiver(post_save, sender=Order)
 def order_created_notify(sender, instance: Order, created: bool, **kwargs):
     """
-    Handle new order creation - send confirmation email and Telegram notification
+    Handle new order creation - queue confirmation email and Telegram notification
+    (jobs become visible to the worker when the order's transaction commits)
     """
     if created:
-        # Fire async Telegram notification; best-effort
-        try:
-            notify_new_order(instance)
-        except Exception as e:
-            logger.error(f"Failed to send Telegram notification for order #{instance.id}: {str(e)}")
-        
-        # Send order confirmation email asynchronously to avoid database locks
-        def send_email():
-            try:
-                send_order_confirmation_email(instance)
-                logger.info(f"Order confirmation email sent for order #{instance.id}")
-            except Exception as e:
-                logger.error(f"Failed to send order confirmation email for order #{instance.id}: {str(e)}")
-        
-        # Start email sending in a separate thread
-        email_thread = threading.Thread(target=send_email)
-        email_thread.daemon = True
-        email_thread.start()
+        enqueue('orders.notify_new_order', order_id=instance.id)
+        enqueue('orders.send_confirmation_email', order_id=instance.id)
+
+
+@receiver(post_save, sender=OrderItem)
+@receiver(post_delete, sender=OrderItem)
+def order_item_changed(sender, instance: OrderItem, **kwargs):
+    """Keep the order's item summary in sync with edits made outside checkout (e.g. admin inlines)."""
+    Order.refresh_summaries([instance.order_id])
+    order = Order.objects.filter(pk=instance.order_id, status='delivered').only('created_at').first()
+    if order is not None:
+        rollups.rebuild([timezone.localdate(order.created_at)])
+
+
+@receiver(pre_delete, sender=Order)
+def delivered_order_deleted(sender, instance: Order, **kwargs):
+    """Take a deleted delivered order (its items still exist here) out of the sales rollup."""
+    if instance.status == 'delivered':
+        rollups.remove_orders([instance.pk])
@@ -0,0 +1,88 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from jobs.models import Job
+from jobs.queue import enqueue, task
+from depod_api.integrations.telegram import notify_new_order as post_new_order, send_message as send_telegram
+from .models import Order
+from .forecasting import forecast_stock as compute_forecasts
+from .email_utils import ORDER_EMAILS, send_order_confirmation_email, send_order_delivered_email, send_order_emails as send_emails
+
+logger = logging.getLogger(__name__)
+
+
+def _get_order(order_id):
+    order = Order.objects.select_related('user', 'delivery_address').filter(pk=order_id).first()
+    if order is None:
+        logger.warning(f"Order #{order_id} no longer exists; skipping job")
+    return order
+
+
+@task('orders.notify_new_order')
+def notify_new_order(order_id):
+    order = _get_order(order_id)
+    if order is not None:
+        post_new_order(order)
+
+
+@task('orders.send_telegram_message')
+def send_telegram_message(text):
+    """A Telegram message the notifier could not deliver; sent directly so failures are retried."""
+    send_telegram(text)
+
+
+@task('orders.send_confirmation_email')
+def send_confirmation_email(order_id):
+    order = _get_order(order_id)
+    if order is None or not order.user.email:
+        return
+    if not send_order_confirmation_email(order):
+        raise RuntimeError(f"Order confirmation email for order #{order_id} was not sent")
+
+
+@task('orders.send_delivered_email')
+def send_delivered_email(order_id):
+    order = _get_order(order_id)
+    if order is None or not order.user.email:
+        return
+    if not send_order_delivered_email(order):
+        raise RuntimeError(f"Delivery confirmation email for order #{order_id} was not sent")
+
+
+@task('orders.send_order_emails')
+def send_order_emails(kind, order_ids):
+    """
+    Bulk email job: renders and sends the ``kind`` email for a chunk of orders
+    over one SMTP connection. Orders that failed are handed to a follow-up job
+    so the ones already sent are not mailed twice.
+    """
+    orders = list(
+        Order.objects.select_related('user', 'delivery_address').prefetch_related('items').filter(pk__in=order_ids)
+    )
+    sent, failed = send_emails(orders, kind)
+    if failed and not sent:
+        raise RuntimeError(f"No {ORDER_EMAILS[kind]['label']} emails could be sent for orders {failed}")
+    if failed:
+        logger.warning(f"{len(failed)} {ORDER_EMAILS[kind]['label']} emails failed; retrying them in a new job")
+        run_at = timezone.now() + timedelta(seconds=settings.JOB_BACKOFF_BASE)
+        enqueue('orders.send_order_emails', run_at=run_at, kind=kind, order_ids=failed)
+
+
+def schedule_forecast(run_at=None):
+    """Queue the next stock forecast unless one is already waiting."""
+    if not Job.objects.filter(name='orders.forecast_stock', status='queued').exists():
+        enqueue('orders.forecast_stock', run_at=run_at)
+
+
+@task('orders.forecast_stock')
+def forecast_stock():
+    """Recompute stock forecasts for the whole catalog, then schedule the next run."""
+    try:
+        count = compute_forecasts()
+        logger.info(f"Stock forecast updated for {count} products")
+    finally:
+        # Also after a failure: a job that ends up dead must not stop the schedule
+        schedule_forecast(timezone.now() + timedelta(seconds=settings.STOCK_FORECAST_INTERVAL))
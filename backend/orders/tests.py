@@ -0,0 +1,201 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import DeliveryAddress, User
+from catalog.models import Category, Product
+from . import rollups
+from .models import DailySalesRollup, IdempotencyKey, Order, OrderItem
+from .utils import reserve_stock, reserve_stock_batch
+
+
+class OrderTestMixin:
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(key='earphones', name='Earphones')
+        cls.other_category = Category.objects.create(key='chargers', name='Chargers')
+        cls.user = User.objects.create(
+            email='buyer@example.com', first_name='A', last_name='B', phone='+994500000000', birth_date='2000-01-01',
+        )
+        cls.address = DeliveryAddress.objects.create(
+            user=cls.user, city='baku', district='nasimi', street='S', building='1', phone='1',
+            receiver_first_name='A', receiver_last_name='B',
+        )
+
+    def make_product(self, stock=5, **kwargs):
+        kwargs.setdefault('category', self.category)
+        return Product.objects.create(
+            name='Peak', price=Decimal('50.00'), cost_price=Decimal('20.00'), stock=stock, in_stock=True, **kwargs
+        )
+
+
+class ReserveStockTests(OrderTestMixin, TestCase):
+    def test_reserve_stock_rejects_oversell(self):
+        product = self.make_product(stock=2)
+        self.assertFalse(reserve_stock(product.pk, 3))
+        product.refresh_from_db()
+        self.assertEqual(product.stock, 2)
+        self.assertTrue(product.in_stock)
+
+    def test_reserve_stock_clears_in_stock_on_last_unit(self):
+        product = self.make_product(stock=2)
+        self.assertTrue(reserve_stock(product.pk, 2))
+        product.refresh_from_db()
+        self.assertEqual(product.stock, 0)
+        self.assertFalse(product.in_stock)
+
+    def test_batch_deducts_nothing_when_one_product_is_short(self):
+        first, second = self.make_product(stock=5), self.make_product(stock=1)
+        self.assertEqual(reserve_stock_batch({first.pk: 2, second.pk: 2}), [second.pk])
+        self.assertEqual(
+            list(Product.objects.filter(pk__in=[first.pk, second.pk]).order_by('pk').values_list('stock', flat=True)),
+            [5, 1],
+        )
+
+    def test_batch_deducts_every_product(self):
+        first, second = self.make_product(stock=5), self.make_product(stock=2)
+        self.assertEqual(reserve_stock_batch({first.pk: 2, second.pk: 2}), [])
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((first.stock, first.in_stock), (3, True))
+        self.assertEqual((second.stock, second.in_stock), (0, False))
+
+    def test_checkout_rejects_oversell(self):
+        product = self.make_product(stock=1)
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.post('/api/orders/', {
+            'items': [{'product_id': product.pk, 'quantity': 2}],
+            'delivery_address_id': self.address.pk,
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['product_ids'], [product.pk])
+        self.assertFalse(Order.objects.exists())
+        product.refresh_from_db()
+        self.assertEqual(product.stock, 1)
+
+
+class IdempotencyTests(OrderTestMixin, TestCase):
+    def setUp(self):
+        self.product = self.make_product(stock=10)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.body = {'product_id': self.product.pk, 'quantity': 1, 'delivery_address_id': self.address.pk}
+
+    def post(self, key, body=None):
+        return self.client.post('/api/orders/', body or self.body, format='json', HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_same_key_replays_response(self):
+        first = self.post('key-1')
+        second = self.post('key-1')
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(second.status_code, 201)
+        self.assertEqual(second.json()['id'], first.json()['id'])
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertEqual(Order.objects.count(), 1)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 9)
+
+    def test_same_key_with_different_body_is_rejected(self):
+        self.assertEqual(self.post('key-1').status_code, 201)
+        response = self.post('key-1', {**self.body, 'quantity': 2})
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_unfinished_claim_conflicts_until_its_lease_runs_out(self):
+        self.assertEqual(self.post('key-1').status_code, 201)
+        record = IdempotencyKey.objects.get(key='key-1')
+        # A request that claimed the key and never finished
+        record.status_code = None
+        record.locked_until = timezone.now() + timedelta(seconds=30)
+        record.save()
+        Order.objects.all().delete()
+
+        response = self.post('key-1')
+        self.assertEqual(response.status_code, 409)
+        self.assertIn('Retry-After', response)
+        self.assertFalse(Order.objects.exists())
+
+        IdempotencyKey.objects.filter(pk=record.pk).update(locked_until=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(self.post('key-1').status_code, 201)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_client_error_is_replayed(self):
+        body = {**self.body, 'quantity': 99}
+        self.assertEqual(self.post('key-1', body).status_code, 400)
+        Product.objects.filter(pk=self.product.pk).update(stock=100)
+        response = self.post('key-1', body)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response['Idempotent-Replayed'], 'true')
+        self.assertFalse(Order.objects.exists())
+
+
+class SalesRollupTests(OrderTestMixin, TestCase):
+    def setUp(self):
+        self.products = [self.make_product(stock=None), self.make_product(stock=None, category=self.other_category)]
+
+    def make_order(self, *lines, days_ago=0):
+        order = Order.objects.create(
+            user=self.user, status='pending', total_price=Decimal('0.00'),
+            estimated_delivery=timezone.now() + timedelta(days=3),
+        )
+        Order.objects.filter(pk=order.pk).update(created_at=timezone.now() - timedelta(days=days_ago))
+        order.refresh_from_db()
+        for product, quantity, unit_price in lines:
+            OrderItem.objects.create(
+                order=order, product=product, name=product.name, image='', quantity=quantity,
+                unit_price=unit_price, subtotal=unit_price * quantity,
+            )
+        return order
+
+    def set_status(self, order, status):
+        order.status = status
+        order.save()
+
+    def rollup_rows(self):
+        # Subtracting an order can leave an all-zero row behind; rebuild() does not create those
+        rows = DailySalesRollup.objects.exclude(units=0, revenue=0, cost=0, profit=0)
+        return sorted(rows.values_list('date', 'category_id', 'units', 'revenue', 'cost', 'profit'))
+
+    def assertMatchesRebuild(self):
+        incremental = self.rollup_rows()
+        rollups.rebuild()
+        self.assertEqual(incremental, self.rollup_rows())
+
+    def test_incremental_rollup_matches_rebuild(self):
+        first, second = self.products
+        today = self.make_order((first, 2, Decimal('50.00')), (second, 1, Decimal('45.50')))
+        yesterday = self.make_order((first, 1, Decimal('50.00')), days_ago=1)
+        cancelled = self.make_order((second, 3, Decimal('40.00')))
+        for order in (today, yesterday, cancelled):
+            self.set_status(order, 'delivered')
+        self.set_status(cancelled, 'cancelled')
+        yesterday.delete()
+        self.assertEqual(DailySalesRollup.objects.get(category=self.category).units, 2)
+        self.assertMatchesRebuild()
+
+    def test_item_edit_on_delivered_order_matches_rebuild(self):
+        order = self.make_order((self.products[0], 1, Decimal('50.00')))
+        self.set_status(order, 'delivered')
+        item = order.items.get()
+        item.quantity = 4
+        item.subtotal = Decimal('200.00')
+        item.save()
+        self.assertMatchesRebuild()
+
+    def test_category_change_keeps_sales_with_old_category(self):
+        product = self.products[0]
+        order = self.make_order((product, 2, Decimal('50.00')))
+        self.set_status(order, 'delivered')
+        product.category = self.other_category
+        product.save()
+        self.assertMatchesRebuild()
+        self.set_status(order, 'cancelled')
+        self.assertEqual(
+            set(DailySalesRollup.objects.values_list('category_id', 'units')),
+            {(self.category.pk, 0)},
+        )
+        self.assertMatchesRebuild()
@@ -1,5 +1,110 @@
 from django.db import transaction
+from django.db.models import Case, F, IntegerField, Sum, Value, When
 from catalog.models import Product
+from catalog.cache import bump_catalog_version, bump_stock_versions
+from .models import OrderItem
+
+
+def reserve_stock(product_id, quantity):
+    """
+    Deduct stock with a single conditional UPDATE (no row lock held across
+    the request). Returns False when fewer than ``quantity`` units are left.
+    Only call for products with stock tracking (stock is not None).
+    - in_stock is cleared when the last unit is taken.
+    - queryset.update() bypasses the post_save handler that invalidates catalog
+      caches: the product's stock version is bumped, and the whole catalog
+      only when in_stock may have changed.
+    """
+    # Usual case: units remain and the product is already listed as in stock
+    if Product.objects.filter(pk=product_id, stock__gt=quantity, in_stock=True).update(stock=F('stock') - quantity):
+        bump_stock_versions([product_id])
+        return True
+    updated = Product.objects.filter(pk=product_id, stock__gte=quantity).update(
+        stock=F('stock') - quantity,
+        # Right-hand sides see the pre-update row
+        in_stock=Case(When(stock__gt=quantity, then=Value(True)), default=Value(False)),
+    )
+    if updated:
+        bump_stock_versions([product_id])
+        bump_catalog_version()
+    return bool(updated)
+
+
+def reserve_stock_batch(quantities):
+    """
+    Deduct stock for a whole cart ({product_id: quantity}) inside the caller's
+    transaction. Returns the ids of products without enough stock; nothing is
+    deducted in that case. Only pass products with stock tracking.
+    - One locking SELECT in ascending id order (concurrent carts cannot deadlock)
+      and one UPDATE, whatever the number of products.
+    """
+    if not quantities:
+        return []
+    if len(quantities) == 1:
+        # Nothing to order locks against: the lock-free conditional UPDATE is enough
+        [(product_id, quantity)] = quantities.items()
+        return [] if reserve_stock(product_id, quantity) else [product_id]
+
+    locked = list(
+        Product.objects.select_for_update()
+        .filter(pk__in=quantities, stock__isnull=False)
+        .order_by('pk')
+        .values_list('pk', 'stock', 'in_stock')
+    )
+    short = [pk for pk, stock, _ in locked if stock < quantities[pk]]
+    if short or not locked:
+        return short
+
+    # Rows are locked, so the update cannot take stock below what was checked
+    Product.objects.filter(pk__in=[pk for pk, _, _ in locked]).update(
+        stock=F('stock') - Case(
+            *[When(pk=pk, then=Value(quantities[pk])) for pk, _, _ in locked],
+            output_field=IntegerField(),
+        ),
+        in_stock=Case(
+            *[When(pk=pk, stock__gt=quantities[pk], then=Value(True)) for pk, _, _ in locked],
+            default=Value(False),
+        ),
+    )
+    bump_stock_versions([pk for pk, _, _ in locked])
+    # Listings only show in_stock; leave them cached unless it changed
+    if any(in_stock != (stock > quantities[pk]) for pk, stock, in_stock in locked):
+        bump_catalog_version()
+    return []
+
+
+def _restore_stock(items):
+    """
+    Add the quantities of ``items`` (an OrderItem queryset) back to stock:
+    one aggregate query, one locking SELECT in ascending id order and one UPDATE.
+    """
+    quantities = {
+        row['product_id']: row['quantity']
+        for row in items.order_by().values('product_id').annotate(quantity=Sum('quantity'))
+        if row['quantity']
+    }
+    if not quantities:
+        return
+    with transaction.atomic():
+        # Same lock order as reserve_stock_batch, so restores and checkouts cannot deadlock
+        locked = list(
+            Product.objects.select_for_update()
+            .filter(pk__in=quantities, stock__isnull=False)
+            .order_by('pk')
+            .values_list('pk', 'in_stock')
+        )
+        if not locked:
+            return
+        Product.objects.filter(pk__in=[pk for pk, _ in locked]).update(
+            stock=F('stock') + Case(
+                *[When(pk=pk, then=Value(quantities[pk])) for pk, _ in locked],
+                output_field=IntegerField(),
+            ),
+            in_stock=True,
+        )
+        bump_stock_versions([pk for pk, _ in locked])
+        if not all(in_stock for _, in_stock in locked):
+            bump_catalog_version()
 
 
 def restore_order_stock(order):
@@ -8,12 +113,9 @@ def restore_order_stock(order):
     - Skips products with stock is None (no stock tracking).
     - Ensures in_stock is True if resulting stock > 0.
     """
-    with transaction.atomic():
-        for item in order.items.all():
-            prod = Product.objects.select_for_update().get(pk=item.product_id)
-            if prod.stock is None:
-                continue
-            prod.stock = (prod.stock or 0) + item.quantity
-            if prod.stock > 0:
-                prod.in_stock = True
-            prod.save(update_fields=["stock", "in_stock"])
+    _restore_stock(OrderItem.objects.filter(order_id=order.pk))
+
+
+def restore_orders_stock(orders):
+    """Like restore_order_stock, for every order in the ``orders`` queryset at once."""
+    _restore_stock(OrderItem.objects.filter(order__in=orders))
@@ -5,11 +5,13 @@ from django.utils import timezone
 from datetime import timedelta
 from decimal import Decimal
 from django.db import transaction
-from .utils import restore_order_stock
+from .utils import reserve_stock_batch, restore_order_stock
+from .idempotency import idempotent
 
 from .models import Order, OrderItem
 from .serializers import OrderSerializer, CreateOrderSerializer
 from catalog.models import Product
+from catalog.pricing import is_student, price_line
 
 
 class IsOwner(permissions.BasePermission):
@@ -22,13 +24,18 @@ class OrderViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated, IsOwner]
 
     def get_queryset(self):
-        return Order.objects.filter(user=self.request.user).order_by('-created_at')
-
+        return (
+            Order.objects.filter(user=self.request.user)
+            .select_related('delivery_address')
+            .prefetch_related('items')
+            .order_by('-created_at')
+        )
+
+    @idempotent('orders.create')
     def create(self, request, *args, **kwargs):
         ser = CreateOrderSerializer(data=request.data, context={'request': request})
         ser.is_valid(raise_exception=True)
-        product_id = ser.validated_data['product_id']
-        quantity = ser.validated_data['quantity']
+        items = ser.validated_data['items']
         delivery_address_id = ser.validated_data['delivery_address_id']
         pricing_snapshot = ser.validated_data.get('pricing_snapshot')
 
@@ -36,64 +43,64 @@ class OrderViewSet(viewsets.ModelViewSet):
         from accounts.models import DeliveryAddress
         delivery_address = DeliveryAddress.objects.get(id=delivery_address_id, user=request.user)
 
-        # Work in a transaction to avoid overselling; lock product row
-        with transaction.atomic():
-            product = (
-                Product.objects.select_for_update()
-                .select_related('category')
-                .prefetch_related('images')
-                .get(id=product_id)
-            )
+        # Everything that does not touch stock happens before the transaction
+        products = Product.objects.select_related('primary_image').in_bulk([item['product_id'] for item in items])
+        missing = [item['product_id'] for item in items if item['product_id'] not in products]
+        if missing:
+            return Response({'message': 'Məhsul tapılmadı', 'missing': missing}, status=status.HTTP_404_NOT_FOUND)
+
+        # Server recompute unit prices (same rules as the pricing quote endpoint)
+        student = is_student(request.user)
+        lines = []
+        for item in items:
+            product = products[item['product_id']]
+            line = price_line(product, item['quantity'], student)
+            line['product'] = product
 
-            # Server recompute unit price
-            price = Decimal(product.price)
-            original_price = price
-            discount_applied = None
-            student_discount_applied = None
-            
-            # Apply product discount first
-            if product.discount and product.discounted_price:
-                price = Decimal(product.discounted_price)
-                discount_applied = product.discount
-
-            # Student pricing if user approved
-            if request.user.student_status == 'approved' and product.student_discount:
-                price = (price * (Decimal('1.00') - Decimal(product.student_discount) / Decimal('100'))).quantize(Decimal('0.01'))
-                student_discount_applied = product.student_discount
-
-            unit_price = price
-            subtotal = (unit_price * quantity).quantize(Decimal('0.01'))
-            total_price = subtotal
-
-            # Enhanced pricing snapshot to include discount details
-            enhanced_snapshot = {
-                'original_price': float(original_price),
-                'final_unit_price': float(unit_price),
-                'product_discount': discount_applied,
-                'student_discount_applied': student_discount_applied,
-                'user_student_status': request.user.student_status,
-                'quantity': quantity,
-                'subtotal': float(subtotal),
-                'total': float(total_price),
-                'timestamp': timezone.now().isoformat(),
-            }
-            
-            # Merge with any frontend snapshot
-            if pricing_snapshot:
-                enhanced_snapshot.update(pricing_snapshot)
-
-            # If stock tracking enabled, validate and deduct
-            if product.stock is not None:
-                if product.stock < quantity:
-                    return Response({'message': 'Yetərli stok yoxdur'}, status=status.HTTP_400_BAD_REQUEST)
-                product.stock = product.stock - quantity
-                # Update in_stock flag accordingly
-                if product.stock <= 0:
-                    product.stock = 0
-                    product.in_stock = False
-                else:
-                    product.in_stock = True
-                product.save(update_fields=['stock', 'in_stock'])
+            # pick main image URL
+            main_image_url = None
+            if product.main_image:
+                main_image_url = request.build_absolute_uri(product.main_image.url)
+            elif product.primary_image:
+                main_image_url = request.build_absolute_uri(product.primary_image.image.url)
+            line['image'] = main_image_url or ''
+            lines.append(line)
+        total_price = sum((line['subtotal'] for line in lines), Decimal('0.00'))
+
+        # Enhanced pricing snapshot to include discount details
+        enhanced_snapshot = {
+            'items': [
+                {
+                    'product_id': line['product'].id,
+                    'original_price': float(line['original_price']),
+                    'final_unit_price': float(line['unit_price']),
+                    'product_discount': line['product_discount'],
+                    'student_discount_applied': line['student_discount'],
+                    'quantity': line['quantity'],
+                    'subtotal': float(line['subtotal']),
+                }
+                for line in lines
+            ],
+            'user_student_status': request.user.student_status,
+            'total': float(total_price),
+            'timestamp': timezone.now().isoformat(),
+        }
+        if len(lines) == 1:
+            # Single-product orders keep the flat keys read by Order.get_discount_details
+            enhanced_snapshot.update({k: v for k, v in enhanced_snapshot['items'][0].items() if k != 'product_id'})
+
+        # Merge with any frontend snapshot
+        if pricing_snapshot:
+            enhanced_snapshot.update(pricing_snapshot)
+
+        # All products' stock is reserved together (ascending id locks, one UPDATE);
+        # the transaction rolls the reservation back if creating the order fails
+        with transaction.atomic():
+            short = reserve_stock_batch({
+                line['product'].id: line['quantity'] for line in lines if line['product'].stock is not None
+            })
+            if short:
+                return Response({'message': 'Yetərli stok yoxdur', 'product_ids': short}, status=status.HTTP_400_BAD_REQUEST)
 
             order = Order.objects.create(
                 user=request.user,
@@ -102,26 +109,27 @@ class OrderViewSet(viewsets.ModelViewSet):
                 total_price=total_price,
                 estimated_delivery=timezone.now() + timedelta(days=3),
                 pricing_snapshot=enhanced_snapshot,
+                # bulk_create skips OrderItem signals, so the summary is filled in here
+                first_product=lines[0]['product'],
+                first_item_name=lines[0]['product'].name,
+                first_item_image=lines[0]['image'],
+                item_count=len(lines),
             )
 
-            # pick main image URL
-            main_image_url = None
-            if product.main_image:
-                main_image_url = request.build_absolute_uri(product.main_image.url)
-            else:
-                main = product.images.filter(is_main=True).first()
-                if main:
-                    main_image_url = request.build_absolute_uri(main.image.url)
-
-            OrderItem.objects.create(
-                order=order,
-                product=product,
-                name=product.name,
-                image=main_image_url or '',
-                quantity=quantity,
-                unit_price=unit_price,
-                subtotal=subtotal,
-            )
+            OrderItem.objects.bulk_create([
+                OrderItem(
+                    order=order,
+                    product=line['product'],
+                    name=line['product'].name,
+                    image=line['image'],
+                    quantity=line['quantity'],
+                    unit_price=line['unit_price'],
+                    subtotal=line['subtotal'],
+                    unit_cost=line['product'].cost_price,
+                    category_id=line['product'].category_id,
+                )
+                for line in lines
+            ])
         return Response(OrderSerializer(order).data, status=status.HTTP_201_CREATED)
 
     def partial_update(self, request, *args, **kwargs):
@@ -1,10 +1,13 @@
 from django.contrib import admin
+from depod_api.admin_mixins import LargeTableAdminMixin
 from .models import Payment
 
 
 @admin.register(Payment)
-class PaymentAdmin(admin.ModelAdmin):
+class PaymentAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ('id', 'provider', 'order', 'amount', 'currency', 'status', 'reference', 'created_at')
     list_filter = ('provider', 'status', 'currency', 'created_at')
     search_fields = ('id', 'order__id', 'reference')
+    # Order.__str__ shows the user's email
+    list_select_related = ('order__user',)
     readonly_fields = ('created_at', 'updated_at', 'callback_payload')
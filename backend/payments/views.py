@@ -7,6 +7,7 @@ from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework import status
 
 from orders.models import Order
+from orders.idempotency import idempotent
 from .models import Payment
 from .client import OderoClient
 
@@ -14,6 +15,7 @@ from .client import OderoClient
 class OderoCreateSessionView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @idempotent('payments.odero.create')
     def post(self, request, *args, **kwargs):
         order_id = request.data.get('order_id')
         if not order_id:
@@ -0,0 +1,11 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from depod_api.versioning import bump_version
+from .models import ProductReview
+
+
+@receiver(post_save, sender=ProductReview)
+@receiver(post_delete, sender=ProductReview)
+def review_changed(sender, **kwargs):
+    """Advance the version stamp used for product_stats ETag/Last-Modified."""
+    bump_version(sender._meta.label_lower)
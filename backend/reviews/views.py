@@ -5,6 +5,7 @@ from django.db.models import Avg, Count
 from .models import ProductReview
 from .serializers import ProductReviewSerializer, ProductReviewCreateSerializer
 from catalog.models import Product
+from depod_api.versioning import conditional_get
 
 
 class ProductReviewViewSet(viewsets.ModelViewSet):
@@ -47,6 +48,7 @@ class ProductReviewViewSet(viewsets.ModelViewSet):
         return super().destroy(request, *args, **kwargs)
 
     @action(detail=False, methods=['get'])
+    @conditional_get('catalog', 'reviews.productreview')
     def product_stats(self, request):
         """Get review statistics for a product"""
         product_id = request.query_params.get('product_id')
@@ -103,6 +103,51 @@
     return opts;
   }
 
+  // Idempotency-Key per distinct request body: repeats of the same checkout
+  // (double clicks, retries) reuse the key until a request with it succeeds,
+  // so the backend replays the first response instead of creating duplicates.
+  const IDEMPOTENCY_STORE = "depod_idempotency_keys";
+  // 409 answers "still running"; past the backend's lease (IDEMPOTENCY_LOCK_TIMEOUT,
+  // 60s) with some margin, the first request is taken to be lost and the key dropped
+  const IDEMPOTENCY_LEASE_MS = 90 * 1000;
+
+  function idempotencyKey(scope, body) {
+    const id = `${scope}:${body}`;
+    let store = {};
+    try {
+      store = JSON.parse(sessionStorage.getItem(IDEMPOTENCY_STORE) || "{}");
+    } catch (_) {}
+    // Entries are { key, at } (first use); plain strings come from older versions
+    if (typeof store[id] === "string") store[id] = { key: store[id], at: Date.now() };
+    if (!store[id] || !store[id].key) {
+      store[id] = {
+        key:
+          window.crypto && typeof window.crypto.randomUUID === "function"
+            ? window.crypto.randomUUID()
+            : `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`,
+        at: Date.now(),
+      };
+    }
+    sessionStorage.setItem(IDEMPOTENCY_STORE, JSON.stringify(store));
+    const entry = store[id];
+    return {
+      key: entry.key,
+      // Client errors are final for this body; 409 only once the first request is past its lease
+      settle(status) {
+        if (status >= 400 && status < 500 && (status !== 409 || Date.now() - entry.at > IDEMPOTENCY_LEASE_MS)) {
+          this.release();
+        }
+      },
+      release() {
+        try {
+          const latest = JSON.parse(sessionStorage.getItem(IDEMPOTENCY_STORE) || "{}");
+          delete latest[id];
+          sessionStorage.setItem(IDEMPOTENCY_STORE, JSON.stringify(latest));
+        } catch (_) {}
+      },
+    };
+  }
+
   async function fetchJson(url, opts = {}) {
     const finalOpts = await withCsrfHeaders({
       headers: { Accept: "application/json", ...(opts.headers || {}) },
@@ -133,9 +178,10 @@
   }
 
   async function listProducts(category = null) {
-    const url = category
-      ? apiUrl(`/api/products/?category=${encodeURIComponent(category)}`)
-      : apiUrl("/api/products/");
+    // Default (card) representation: what the product grid renders
+    const params = new URLSearchParams();
+    if (category) params.set("category", category);
+    const url = apiUrl(`/api/products/?${params.toString()}`);
     const data = await fetchJson(url);
     // DRF pagination support
     return Array.isArray(data) ? data : data.results || [];
@@ -145,6 +191,16 @@
     return fetchJson(apiUrl(`/api/products/${encodeURIComponent(id)}/`));
   }
 
+  // Fetch several products in one request; resolves to { [id]: product }
+  async function getProductsBatch(ids) {
+    const unique = [...new Set((ids || []).map((id) => String(id)))];
+    if (!unique.length) return {};
+    const data = await fetchJson(
+      apiUrl(`/api/products/batch/?ids=${encodeURIComponent(unique.join(","))}`)
+    );
+    return data.results || {};
+  }
+
   async function listCategories() {
     const data = await fetchJson(apiUrl("/api/categories/"));
     return Array.isArray(data) ? data : data.results || [];
@@ -174,6 +230,8 @@
   // E-commerce API functions
   async function createOrder(orderData) {
     const token = localStorage.getItem("depod_access_token");
+    const body = JSON.stringify(orderData);
+    const idem = idempotencyKey("orders.create", body);
     const resp = await fetch(
       apiUrl("/api/orders/"),
       await withCsrfHeaders({
@@ -181,15 +239,18 @@
         headers: {
           "Content-Type": "application/json",
           Authorization: token ? `Bearer ${token}` : undefined,
+          "Idempotency-Key": idem.key,
         },
         credentials: "include",
-        body: JSON.stringify(orderData),
+        body,
       })
     );
 
     if (!resp.ok) {
+      idem.settle(resp.status);
       throw new Error(`HTTP ${resp.status}: ${resp.statusText}`);
     }
+    idem.release();
     return resp.json();
   }
 
@@ -246,6 +307,28 @@
     return resp.json();
   }
 
+  // Price several cart lines at once: [{product_id, quantity}, ...]
+  async function quotePrices(lines) {
+    const token = localStorage.getItem("depod_access_token");
+    const resp = await fetch(
+      apiUrl("/api/pricing/quote/"),
+      await withCsrfHeaders({
+        method: "POST",
+        headers: {
+          "Content-Type": "application/json",
+          Authorization: token ? `Bearer ${token}` : undefined,
+        },
+        credentials: "include",
+        body: JSON.stringify({ lines }),
+      })
+    );
+
+    if (!resp.ok) {
+      throw new Error(`HTTP ${resp.status}: ${resp.statusText}`);
+    }
+    return resp.json();
+  }
+
   async function getStudentDiscount() {
     const token = localStorage.getItem("depod_access_token");
     const resp = await fetch(apiUrl("/api/student-discount/"), {
@@ -282,6 +365,8 @@
   // Payments API
   async function createOderoPaymentSession(orderId) {
     const token = localStorage.getItem("depod_access_token");
+    const body = JSON.stringify({ order_id: orderId });
+    const idem = idempotencyKey("payments.odero.create", body);
     const resp = await fetch(
       apiUrl("/api/payments/odero/create/"),
       await withCsrfHeaders({
@@ -289,12 +374,17 @@
         headers: {
           "Content-Type": "application/json",
           Authorization: token ? `Bearer ${token}` : undefined,
+          "Idempotency-Key": idem.key,
         },
         credentials: "include",
-        body: JSON.stringify({ order_id: orderId }),
+        body,
       })
     );
-    if (!resp.ok) throw new Error(`HTTP ${resp.status}: ${resp.statusText}`);
+    if (!resp.ok) {
+      idem.settle(resp.status);
+      throw new Error(`HTTP ${resp.status}: ${resp.statusText}`);
+    }
+    // Key kept after success: paying for the same order again reuses its session
     return resp.json(); // { payment_id, payment_url }
   }
 
@@ -538,11 +628,13 @@
     getCsrfToken: ensureCsrfToken,
     listProducts,
     getProduct,
+    getProductsBatch,
     listCategories,
     createOrder,
     getOrders,
     updateOrderStatus,
     getProductPricing,
+    quotePrices,
     getStudentDiscount,
     getOrder,
     getStudentQr,
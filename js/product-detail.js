@@ -53,8 +53,11 @@ function createPriceHTML(product) {
   const hasGeneralDiscount =
     isNum(discounted) && (isNum(price) ? discounted < price : true);
 
+  // Prefer the server-computed student price (pricing engine)
   const computeStudent = (val) =>
-    isNum(val) && isNum(studentPct) && studentPct > 0
+    isNum(product.studentPrice)
+      ? product.studentPrice
+      : isNum(val) && isNum(studentPct) && studentPct > 0
       ? val * (1 - studentPct / 100)
       : val;
 
@@ -207,6 +210,12 @@ async function getProductById(productId) {
             : null),
         discount,
         studentDiscount,
+        finalPrice: isNum(toNum(p.final_price ?? pricing?.final_price))
+          ? toNum(p.final_price ?? pricing?.final_price)
+          : null,
+        studentPrice: isNum(toNum(p.student_price ?? pricing?.student_price))
+          ? toNum(p.student_price ?? pricing?.student_price)
+          : null,
         inStock: Boolean(inStock),
         stock: typeof p.stock === "number" ? p.stock : null,
       };
@@ -243,7 +252,7 @@ async function getAllProducts() {
             "",
           gallery: Array.isArray(p.images) ? p.images.map((i) => i.image) : [],
         },
-        description: p.description || "",
+        description: p.description || p.short_description || "",
         features: Array.isArray(p.features)
           ? p.features.map((f) => f.text)
           : [],
@@ -772,7 +781,9 @@ async function createOrder(productId, quantity) {
           : toNum(pr?.price);
       } catch (_) {}
     }
-    if (isStudent && isNum(toNum(product.studentDiscount))) {
+    if (isStudent && isNum(product.studentPrice)) {
+      unitPrice = product.studentPrice;
+    } else if (isStudent && isNum(toNum(product.studentDiscount))) {
       unitPrice = calculateStudentPrice(
         unitPrice,
         toNum(product.studentDiscount)
@@ -319,12 +319,15 @@ function mapApiProduct(p) {
         "",
       gallery: Array.isArray(p.images) ? p.images.map((i) => i.image) : [],
     },
-    description: p.description || "",
+    description: p.description || p.short_description || "",
     // Pricing/stock - coerce to numbers safely
     price: toNum(priceRaw),
     discountedPrice: toNum(discountedRaw),
     discount: toNum(discountRaw) ?? 0,
     studentDiscount: toNum(studentRaw) ?? 0,
+    // Server-computed final prices (pricing engine); null for local fallback data
+    finalPrice: toNum(p.final_price ?? p.pricing?.final_price),
+    studentPrice: toNum(p.student_price ?? p.pricing?.student_price),
     inStock:
       (typeof p.in_stock === "boolean" ? p.in_stock : undefined) ??
       (typeof p.stock === "number" ? p.stock > 0 : undefined) ??
@@ -376,6 +379,12 @@ function calculateStudentPrice(originalPrice, studentDiscount) {
   return base * (1 - d / 100);
 }
 
+// Student price: the server's value when present, otherwise derived locally
+function studentPriceOf(product, base) {
+  if (isNum(product.studentPrice)) return product.studentPrice;
+  return calculateStudentPrice(base, product.studentDiscount || 0);
+}
+
 // Create price HTML
 function createPriceHTML(product) {
   const isStudent = getUserStudentStatus() === "approved";
@@ -390,7 +399,7 @@ function createPriceHTML(product) {
     // There's a general discount
     const base = product.discountedPrice;
     const currentPrice = isStudent
-      ? calculateStudentPrice(base, product.studentDiscount || 0)
+      ? studentPriceOf(product, base)
       : base;
 
     priceHTML = `
@@ -423,7 +432,7 @@ function createPriceHTML(product) {
     // No general discount, but maybe student discount
     const base = product.price;
     const currentPrice = isStudent
-      ? calculateStudentPrice(base, product.studentDiscount || 0)
+      ? studentPriceOf(product, base)
       : base;
 
     priceHTML = `